@@ -4,6 +4,7 @@
 
 import openai
 import json
+from concurrent.futures import ThreadPoolExecutor
 from aircraft_database import lookup_aircraft, list_all_aircraft
 from fuel_calculator import calculate_fuel, print_fuel_report
 from airport_database import lookup_airport, calculate_route
@@ -16,7 +17,11 @@ from etops_compliance import check_etops_compliance, find_etops_diversions_along
 # ── CONFIGURATION ──────────────────────────────────────────────────────────────
 # Make sure your OPENAI_API_KEY environment variable is set, or pass it directly:
 # client = openai.OpenAI(api_key="your-key-here")
-client = openai.OpenAI()
+
+# Retries on 429 / 5xx / connection errors use the SDK's exponential backoff
+# with jitter, which honors Retry-After (the default is only 2 retries)
+OPENAI_MAX_RETRIES = 6
+client = openai.OpenAI(max_retries=OPENAI_MAX_RETRIES)
 
 
 # ── SYSTEM PROMPT FOR THE AI ──────────────────────────────────────────────────
@@ -341,6 +346,27 @@ def execute_function(function_name: str, arguments: dict):
         return {"error": f"Unknown function: {function_name}"}
 
 
+def execute_functions(calls: list) -> list:
+    """
+    Execute the tool calls from one AI message concurrently.
+    
+    Calls issued together are independent of each other, so running them on a
+    thread pool costs roughly the slowest call (usually a weather fetch)
+    instead of the sum of all of them.
+    
+    Args:
+        calls: List of (function_name, arguments) tuples
+    
+    Returns:
+        List of results in the same order as calls
+    """
+    if len(calls) <= 1:
+        return [execute_function(name, args) for name, args in calls]
+    
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        return list(executor.map(lambda call: execute_function(*call), calls))
+
+
 # ── MAIN AI CHAT FUNCTION ─────────────────────────────────────────────────────
 def chat_with_ai(user_message: str, conversation_history: list = None) -> dict:
     """
@@ -379,15 +405,18 @@ def chat_with_ai(user_message: str, conversation_history: list = None) -> dict:
         # Add assistant's message with tool calls to history
         conversation_history.append(assistant_message)
         
-        # Execute each function call
+        calls = []
         for tool_call in tool_calls:
             function_name = tool_call.function.name
             arguments = json.loads(tool_call.function.arguments)
             
             print(f"🔧 AI is calling: {function_name}({arguments})")
-            
-            # Execute the function
-            result = execute_function(function_name, arguments)
+            calls.append((function_name, arguments))
+        
+        # Execute the function calls concurrently
+        results = execute_functions(calls)
+        
+        for tool_call, (function_name, arguments), result in zip(tool_calls, calls, results):
             function_results.append({
                 "function": function_name,
                 "arguments": arguments,
@@ -426,6 +455,99 @@ def chat_with_ai(user_message: str, conversation_history: list = None) -> dict:
         }
 
 
+# ── STREAMING CHAT FUNCTION ───────────────────────────────────────────────────
+def chat_with_ai_stream(user_message: str, conversation_history: list):
+    """
+    Streaming version of chat_with_ai(): yields the assistant's reply as text
+    chunks while they are generated, e.g. for st.write_stream().
+    
+    Tool calls are executed the same way as in chat_with_ai() before the final
+    answer is streamed. The caller's conversation_history list is updated in place.
+    
+    Args:
+        user_message: The pilot's query
+        conversation_history: Message list to continue (start with the system prompt)
+    
+    Yields:
+        Text fragments of the assistant's reply
+    """
+    conversation_history.append({"role": "user", "content": user_message})
+    
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=conversation_history,
+        tools=tools,
+        tool_choice="auto",
+        stream=True
+    )
+    
+    # Text is yielded as it arrives; tool calls arrive in fragments keyed by index
+    content_parts = []
+    tool_calls = {}
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        
+        if delta.content:
+            content_parts.append(delta.content)
+            yield delta.content
+        
+        for tc in delta.tool_calls or []:
+            call = tool_calls.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                call["arguments"] += tc.function.arguments
+    
+    if not tool_calls:
+        conversation_history.append({"role": "assistant", "content": "".join(content_parts)})
+        return
+    
+    # Add assistant's message with tool calls to history
+    ordered_calls = [tool_calls[i] for i in sorted(tool_calls)]
+    conversation_history.append({
+        "role": "assistant",
+        "content": "".join(content_parts) or None,
+        "tool_calls": [
+            {
+                "id": call["id"],
+                "type": "function",
+                "function": {"name": call["name"], "arguments": call["arguments"]}
+            }
+            for call in ordered_calls
+        ]
+    })
+    
+    # Execute the function calls concurrently
+    results = execute_functions(
+        [(call["name"], json.loads(call["arguments"] or "{}")) for call in ordered_calls]
+    )
+    for call, result in zip(ordered_calls, results):
+        conversation_history.append({
+            "role": "tool",
+            "tool_call_id": call["id"],
+            "content": json.dumps(result)
+        })
+    
+    # Stream the final answer now that the AI has the function results
+    final_stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=conversation_history,
+        stream=True
+    )
+    
+    final_parts = []
+    for chunk in final_stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            final_parts.append(chunk.choices[0].delta.content)
+            yield chunk.choices[0].delta.content
+    
+    conversation_history.append({"role": "assistant", "content": "".join(final_parts)})
+
+
 # ── INTERACTIVE CHAT LOOP ─────────────────────────────────────────────────────
 def interactive_chat():
     """Run an interactive chat session with the AI flight planner."""
@@ -5,6 +5,9 @@
 from typing import List, Dict, Tuple
 import math
 
+# Optional JIT for haversine_distance, which runs once per (waypoint, zone) pair
+from numba_compat import njit
+
 
 # ── KNOWN RESTRICTED AIRSPACE ─────────────────────────────────────────────────
 # This is a simplified database. In production, integrate with:
@@ -140,6 +143,7 @@ RESTRICTED_AIRSPACE = {
 
 # ── DISTANCE CALCULATIONS ─────────────────────────────────────────────────────
 
+@njit(cache=True, fastmath=True)
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate distance in nautical miles"""
     lat1_rad = math.radians(lat1)
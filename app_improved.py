@@ -5,8 +5,10 @@
 # 2. Uses persistent database (supports both SQLite and PostgreSQL)
 
 import streamlit as st
-import openai
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from database import (
     init_database, create_user, authenticate_user, get_user_by_id,
@@ -14,17 +16,19 @@ from database import (
     delete_flight_plan, get_user_statistics
 )
 from aircraft_database import lookup_aircraft, AIRCRAFT_DATABASE
-from airport_database import AIRPORTS, calculate_route
-from fuel_calculator import calculate_fuel
-from weather_checkwx import get_metar, get_taf  # Using CheckWX with FAA fallback
-from route_optimization import generate_route_waypoints
-from airspace_restrictions import check_route_airspace_violations
-from etops_compliance import check_etops_compliance
+from airport_database import AIRPORTS
 import math
 
+# The planning/weather modules (and the waypoint database behind
+# route_optimization) are imported where they are first used, so the login
+# page and saved-plan views don't pay their import cost.
+
 # Initialize database
 init_database()
 
+# Flight category → status emoji for the weather panel
+_FLIGHT_CAT_EMOJI = {"VFR": "🟢", "MVFR": "🟡", "IFR": "🟠", "LIFR": "🔴"}
+
 # ── HELPER: CALCULATE HEADWIND FROM WEATHER ──────────────────────────────────
 def calculate_headwind_from_weather(route_bearing: float, wind_dir: float, wind_speed_kt: float) -> float:
     """
@@ -51,6 +55,83 @@ def calculate_headwind_from_weather(route_bearing: float, wind_dir: float, wind_
     return round(headwind, 1)
 
 
+# ── HELPER: WEATHER PANEL ────────────────────────────────────────────────────
+def render_weather_column(icao: str, wx: dict, label: str) -> None:
+    """Render the wind/temperature/conditions metrics for one airport"""
+    if wx.get('error'):
+        return
+    
+    st.markdown(f"**{icao}** ({label})")
+    st.metric("Wind", f"{wx.get('wind_dir', 'N/A')}° at {wx.get('wind_speed_kt', 0)} kt")
+    st.metric("Temp", f"{wx.get('temp_c', 'N/A')}°C")
+    flight_cat = wx.get('flight_category', 'N/A')
+    cat_color = _FLIGHT_CAT_EMOJI.get(flight_cat, "⚪")
+    st.metric("Conditions", f"{cat_color} {flight_cat}")
+
+
+# ── CACHED DROPDOWN OPTIONS ──────────────────────────────────────────────────
+@st.cache_data
+def _airport_keys() -> list:
+    """ICAO codes for the airport dropdowns (built once, not on every rerun)"""
+    return list(AIRPORTS.keys())
+
+
+@st.cache_data
+def _aircraft_keys() -> list:
+    """Aircraft codes for the aircraft dropdown"""
+    return list(AIRCRAFT_DATABASE.keys())
+
+
+# ── CACHED WEATHER ───────────────────────────────────────────────────────────
+class MetarLookupError(Exception):
+    """A failed METAR lookup, raised so st.cache_data does not memoize it"""
+
+    def __init__(self, result: dict):
+        super().__init__(result.get('error'))
+        self.result = result
+
+
+@st.cache_data(ttl=300)
+def cached_metar(icao: str) -> dict:
+    """METAR for an airport, reused for 5 minutes (METARs update hourly)"""
+    from weather_checkwx import get_metar  # Using CheckWX with FAA fallback
+    result = get_metar(icao)
+    if result.get('error'):
+        raise MetarLookupError(result)
+    return result
+
+
+def fetch_metar(icao: str) -> dict:
+    """cached_metar, with failures returned as the error dict and retried next time"""
+    try:
+        return cached_metar(icao)
+    except MetarLookupError as e:
+        return e.result
+
+
+# ── CACHED ROUTE CHECKS ──────────────────────────────────────────────────────
+# All of these are pure functions of the selected airports/aircraft/altitude,
+# so regenerating the same plan skips the geometry entirely.
+@st.cache_data
+def _route_waypoints(origin: str, destination: str, num_waypoints: int) -> dict:
+    from route_optimization import generate_route_waypoints
+    return generate_route_waypoints(origin, destination, num_waypoints=num_waypoints)
+
+
+@st.cache_data
+def _airspace_check(origin: str, destination: str, num_waypoints: int, altitude_ft: int) -> dict:
+    from airspace_restrictions import check_route_airspace_violations
+    route_detail = _route_waypoints(origin, destination, num_waypoints)
+    return check_route_airspace_violations(route_detail['waypoints'], altitude_ft)
+
+
+@st.cache_data
+def _etops_check(aircraft_code: str, origin: str, destination: str, num_waypoints: int) -> dict:
+    from etops_compliance import check_etops_compliance
+    route_detail = _route_waypoints(origin, destination, num_waypoints)
+    return check_etops_compliance(aircraft_code, route_detail['waypoints'])
+
+
 # ── PAGE CONFIG ──────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="Flight Planner",
@@ -158,10 +239,17 @@ def show_main_app():
     # Main content
     st.markdown(f"# ✈️ Flight Planner - Welcome, {user['full_name'] or user['username']}!")
     
-    tab1, tab2, tab3 = st.tabs(["📋 New Flight Plan", "📚 My Flight Plans", "📊 Dashboard"])
+    # st.tabs runs every tab body on each rerun; a radio lets us only
+    # execute (and query the database for) the page that is actually shown
+    page = st.radio(
+        "Navigation",
+        ["📋 New Flight Plan", "📚 My Flight Plans", "📊 Dashboard"],
+        horizontal=True,
+        label_visibility="collapsed"
+    )
     
     # ── TAB 1: CREATE NEW FLIGHT PLAN (WITH AUTO WEATHER) ────────────────────
-    with tab1:
+    if page == "📋 New Flight Plan":
         st.markdown("### Create New Flight Plan")
         
         # Check if CheckWX API is configured
@@ -177,28 +265,42 @@ def show_main_app():
             
             col1, col2 = st.columns(2)
             with col1:
-                aircraft = st.selectbox("Aircraft", options=list(AIRCRAFT_DATABASE.keys()))
-                origin = st.selectbox("Origin", options=list(AIRPORTS.keys()),
+                aircraft = st.selectbox("Aircraft", options=_aircraft_keys())
+                origin = st.selectbox("Origin", options=_airport_keys(),
                                     format_func=lambda x: f"{x} - {AIRPORTS[x]['name']}")
             with col2:
                 altitude = st.number_input("Altitude (ft)", value=35000, step=1000, min_value=30000, max_value=42000)
-                destination = st.selectbox("Destination", options=list(AIRPORTS.keys()),
+                destination = st.selectbox("Destination", options=_airport_keys(),
                                          format_func=lambda x: f"{x} - {AIRPORTS[x]['name']}")
             
             submit_plan = st.form_submit_button("🚀 Generate Flight Plan (Auto Weather)", use_container_width=True)
         
         if submit_plan:
+            from fuel_calculator import calculate_fuel
+            
             with st.spinner("Generating comprehensive flight plan with real-time weather..."):
                 
-                # Calculate route
-                route = calculate_route(origin, destination)
-                
-                # Generate route waypoints
-                route_detail = generate_route_waypoints(origin, destination, num_waypoints=5)
+                # Generate route waypoints (also gives us the great-circle distance)
+                route_detail = _route_waypoints(origin, destination, 5)
+                if not route_detail or route_detail.get('error'):
+                    error = route_detail.get('error') if route_detail else "no route returned"
+                    st.error(f"❌ Could not generate route: {error}")
+                    st.stop()
+                distance_nm = route_detail['total_distance_nm']
                 
                 # Get real-time weather for origin and destination
-                origin_wx = get_metar(origin)
-                dest_wx = get_metar(destination)
+                # (both are HTTP round-trips, so fetch them concurrently). The
+                # workers get this run's ScriptRunContext so st.cache_data
+                # works there without "missing ScriptRunContext" warnings
+                script_ctx = get_script_run_ctx()
+                with ThreadPoolExecutor(
+                    max_workers=2,
+                    initializer=lambda: add_script_run_ctx(threading.current_thread(), script_ctx),
+                ) as executor:
+                    origin_future = executor.submit(fetch_metar, origin)
+                    dest_future = executor.submit(fetch_metar, destination)
+                    origin_wx = origin_future.result()
+                    dest_wx = dest_future.result()
                 
                 # Calculate headwind from actual weather
                 if not origin_wx.get('error') and origin_wx.get('wind_speed_kt'):
@@ -217,17 +319,15 @@ def show_main_app():
                     st.warning("⚠️ Weather data unavailable, using 0 kt headwind")
                 
                 # Check airspace
-                airspace_result = check_route_airspace_violations(
-                    route_detail['waypoints'], altitude
-                )
+                airspace_result = _airspace_check(origin, destination, 5, altitude)
                 
                 # Check ETOPS
-                etops_result = check_etops_compliance(aircraft, route_detail['waypoints'])
+                etops_result = _etops_check(aircraft, origin, destination, 5)
                 
                 # Calculate fuel with real headwind
                 fuel_result = calculate_fuel(
                     aircraft_code=aircraft,
-                    distance_nm=route['distance_nm'],
+                    distance_nm=distance_nm,
                     headwind_kt=calculated_headwind,
                     include_alternate=True
                 )
@@ -237,7 +337,7 @@ def show_main_app():
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Distance", f"{route['distance_nm']:,.0f} nm")
+                    st.metric("Distance", f"{distance_nm:,.0f} nm")
                 with col2:
                     st.metric("Calculated Headwind", f"{calculated_headwind} kt")
                 with col3:
@@ -250,22 +350,10 @@ def show_main_app():
                 weather_col1, weather_col2 = st.columns(2)
                 
                 with weather_col1:
-                    if not origin_wx.get('error'):
-                        st.markdown(f"**{origin}** (Origin)")
-                        st.metric("Wind", f"{origin_wx.get('wind_dir', 'N/A')}° at {origin_wx.get('wind_speed_kt', 0)} kt")
-                        st.metric("Temp", f"{origin_wx.get('temp_c', 'N/A')}°C")
-                        flight_cat = origin_wx.get('flight_category', 'N/A')
-                        cat_color = {"VFR": "🟢", "MVFR": "🟡", "IFR": "🟠", "LIFR": "🔴"}.get(flight_cat, "⚪")
-                        st.metric("Conditions", f"{cat_color} {flight_cat}")
+                    render_weather_column(origin, origin_wx, "Origin")
                 
                 with weather_col2:
-                    if not dest_wx.get('error'):
-                        st.markdown(f"**{destination}** (Destination)")
-                        st.metric("Wind", f"{dest_wx.get('wind_dir', 'N/A')}° at {dest_wx.get('wind_speed_kt', 0)} kt")
-                        st.metric("Temp", f"{dest_wx.get('temp_c', 'N/A')}°C")
-                        flight_cat = dest_wx.get('flight_category', 'N/A')
-                        cat_color = {"VFR": "🟢", "MVFR": "🟡", "IFR": "🟠", "LIFR": "🔴"}.get(flight_cat, "⚪")
-                        st.metric("Conditions", f"{cat_color} {flight_cat}")
+                    render_weather_column(destination, dest_wx, "Destination")
                 
                 # Safety summary
                 st.markdown("#### 🛡️ Safety Checks")
@@ -287,7 +375,7 @@ def show_main_app():
                     "aircraft_code": aircraft,
                     "origin_icao": origin,
                     "destination_icao": destination,
-                    "distance_nm": route['distance_nm'],
+                    "distance_nm": distance_nm,
                     "altitude_ft": altitude,
                     "headwind_kt": calculated_headwind,
                     "fuel_required_kg": fuel_result['total_fuel_kg'],
@@ -307,7 +395,7 @@ def show_main_app():
                     st.error(f"Failed to save: {result['error']}")
     
     # ── TAB 2: VIEW SAVED PLANS ──────────────────────────────────────────────
-    with tab2:
+    elif page == "📚 My Flight Plans":
         st.markdown("### My Saved Flight Plans")
         
         plans = get_user_flight_plans(user['user_id'])
@@ -341,7 +429,7 @@ def show_main_app():
             st.info("No flight plans yet. Create your first plan in the 'New Flight Plan' tab!")
     
     # ── TAB 3: DASHBOARD ──────────────────────────────────────────────────────
-    with tab3:
+    elif page == "📊 Dashboard":
         st.markdown("### Dashboard & Analytics")
         
         stats = get_user_statistics(user['user_id'])
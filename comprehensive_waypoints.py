@@ -2,109 +2,681 @@
 # Load comprehensive waypoint database from OurAirports (free database with 50,000+ waypoints)
 # Data source: https://ourairports.com/data/
 
-import csv
+import functools
+import io
+import math
 import urllib.request
 import os
+import threading
+from bisect import bisect_left
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
 from typing import Dict, List, Optional
 
+import numpy as np
+import polars as pl
+
+# SciPy is optional: with it, region and corridor queries use a KD-tree
+# spatial index instead of scanning every waypoint
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# numexpr is optional: with it, large haversine sweeps are evaluated as one
+# fused, multi-threaded expression instead of a chain of NumPy temporaries
+try:
+    import numexpr
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+# Numba is optional: with it, the route-corridor sweep runs as one fused,
+# parallel kernel instead of a chain of NumPy array operations
+from numba_compat import njit, prange, NUMBA_AVAILABLE
+
 # ── DATABASE URLS ─────────────────────────────────────────────────────────────
 NAVAIDS_URL = "https://davidmegginson.github.io/ourairports-data/navaids.csv"
 CACHE_FILE = "navaids_database.csv"
+PARQUET_FILE = "navaids_database.parquet"  # cleaned columns, written after the first CSV parse
+ARRAY_CACHE_DIR = "navaids_arrays"  # .npy column arrays, memory-mapped by every process
+
+# Arrays kept in ARRAY_CACHE_DIR, one <name>.npy file each
+_ARRAY_FILES = ("ident", "name", "type_names", "type", "lat", "lon", "lat_rad", "lon_rad",
+                "frequency", "country", "region")
+
+EARTH_RADIUS_NM = 3440.065
+
+# CSV column → waypoint field
+CSV_COLUMNS = {
+    "ident": "ident",
+    "name": "name",
+    "type": "type",                 # VOR, NDB, DME, WAYPOINT, etc.
+    "latitude_deg": "lat",
+    "longitude_deg": "lon",
+    "frequency_khz": "frequency",
+    "iso_country": "country",
+    "iso_region": "region",
+}
 
 # ── WAYPOINT DATABASE ─────────────────────────────────────────────────────────
-WAYPOINT_DATABASE = {}
+# Stored column-wise: one NumPy array per field, all in the same row order,
+# plus an ident → row index lookup. Dicts are only built for returned rows.
+_IDENT = np.empty(0, dtype=object)
+_NAME = np.empty(0, dtype=object)
+_TYPE_NAMES = np.empty(0, dtype=object)  # distinct navaid types, sorted
+_TYPE = np.empty(0, dtype=np.int8)        # per-row code into _TYPE_NAMES
+_BY_TYPE: Dict[str, np.ndarray] = {}      # type name → its row indices, ascending
+_LAT = np.empty(0, dtype=np.float64)
+_LON = np.empty(0, dtype=np.float64)
+_LAT_RAD = np.empty(0, dtype=np.float64)
+_LON_RAD = np.empty(0, dtype=np.float64)
+_FREQ = np.empty(0, dtype=object)
+_COUNTRY = np.empty(0, dtype=object)
+_REGION = np.empty(0, dtype=object)
+_IDX: Dict[str, int] = {}
+_TREE = None  # cKDTree over unit-sphere (x, y, z) points, if SciPy is installed
+_GRID: Dict[tuple, np.ndarray] = {}  # (floor(lat), floor(lon)) → row indices, ascending
 
+# Lazy loading is done once, under a lock, so concurrent first queries don't
+# each parse the database. Set FLIGHT_PLANNER_EAGER=1 to load at import instead.
+_LOAD_LOCK = threading.Lock()
+_LOADED = False
 
-def download_waypoint_database(force_refresh: bool = False) -> None:
+
+def download_waypoint_database(force_refresh: bool = False) -> Optional[bytes]:
     """
     Download the comprehensive waypoint database from OurAirports.
     This includes VORs, NDBs, DMEs, and waypoints worldwide.
     
     Args:
         force_refresh: Force download even if cache exists
+    
+    Returns:
+        The downloaded CSV bytes (so the caller can parse them without
+        reading the file back), or None if the cached file was kept
     """
     if os.path.exists(CACHE_FILE) and not force_refresh:
         print(f"✅ Using cached database: {CACHE_FILE}")
-        return
+        return None
     
     print(f"📥 Downloading comprehensive waypoint database...")
     print(f"   Source: {NAVAIDS_URL}")
     
+    # The parquet sidecar and array cache are derived from the CSV, so drop
+    # them with the old download
+    if os.path.exists(PARQUET_FILE):
+        os.remove(PARQUET_FILE)
+    for name in _ARRAY_FILES:
+        path = os.path.join(ARRAY_CACHE_DIR, f"{name}.npy")
+        if os.path.exists(path):
+            os.remove(path)
+    
     try:
-        urllib.request.urlretrieve(NAVAIDS_URL, CACHE_FILE)
+        with urllib.request.urlopen(NAVAIDS_URL) as resp:
+            data = resp.read()
+        
+        # Keep the raw CSV on disk too; write-then-rename so an interrupted
+        # save never leaves a truncated cache behind
+        tmp_file = CACHE_FILE + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, CACHE_FILE)
         print(f"✅ Database downloaded: {CACHE_FILE}")
     except Exception as e:
         print(f"❌ Error downloading database: {e}")
         raise
+    
+    return data
 
 
-def load_waypoint_database() -> Dict[str, Dict]:
+def _parse_csv(data: Optional[bytes] = None) -> pl.DataFrame:
     """
-    Load waypoint database from CSV file.
-    Returns dict with waypoint identifiers as keys.
-    """
-    global WAYPOINT_DATABASE
+    Parse and clean the raw navaids CSV into the columns we keep.
     
+    Args:
+        data: CSV bytes already in memory (e.g. fresh from the download);
+              if None, CACHE_FILE is read
+    """
+    # Read everything as text and convert ourselves, so a malformed
+    # coordinate drops that row instead of failing the whole parse
+    if data is not None:
+        lf = pl.read_csv(io.BytesIO(data), infer_schema_length=0).lazy()
+    else:
+        lf = pl.scan_csv(CACHE_FILE, infer_schema_length=0)
+    available = lf.collect_schema().names()
+    
+    return (
+        lf.select([
+            pl.col(column).alias(field) if column in available else pl.lit("").alias(field)
+            for column, field in CSV_COLUMNS.items()
+        ])
+        .with_columns(
+            pl.col("ident").str.strip_chars().str.to_uppercase(),
+            pl.col("lat").cast(pl.Float64, strict=False),
+            pl.col("lon").cast(pl.Float64, strict=False),
+        )
+        .filter(
+            (pl.col("ident") != "") & pl.col("lat").is_not_null() & pl.col("lon").is_not_null()
+        )
+        # Idents are not unique worldwide; the last row for an ident wins but
+        # keeps the position of the first, as assigning into a dict would
+        .with_row_index("_row")
+        .with_columns(pl.col("_row").min().over("ident").alias("_first_row"))
+        .unique(subset="ident", keep="last")
+        .sort("_first_row")
+        .drop("_row", "_first_row")
+        .with_columns(pl.col("name", "type", "frequency", "country", "region").fill_null(""))
+        .collect()
+    )
+
+
+def _columns_from_frame(df: pl.DataFrame) -> Dict[str, np.ndarray]:
+    """Turn the cleaned table into the column arrays (keyed as in _ARRAY_FILES)."""
+    type_names, type_codes = np.unique(df["type"].to_numpy(), return_inverse=True)
+    lat = df["lat"].to_numpy()
+    lon = df["lon"].to_numpy()
+    return {
+        "ident": df["ident"].to_numpy(),
+        "name": df["name"].to_numpy(),
+        "type_names": type_names,
+        "type": type_codes.astype(np.int8 if len(type_names) <= 127 else np.int32),
+        "lat": lat,
+        "lon": lon,
+        "lat_rad": np.radians(lat),
+        "lon_rad": np.radians(lon),
+        "frequency": df["frequency"].to_numpy(),
+        "country": df["country"].to_numpy(),
+        "region": df["region"].to_numpy(),
+    }
+
+
+def _array_cache_is_fresh() -> bool:
+    """True if every cached .npy exists and none predates the CSV."""
+    paths = [os.path.join(ARRAY_CACHE_DIR, f"{name}.npy") for name in _ARRAY_FILES]
+    if not all(os.path.exists(path) for path in paths):
+        return False
     if not os.path.exists(CACHE_FILE):
-        download_waypoint_database()
-    
-    print(f"📖 Loading waypoint database...")
-    
-    waypoints = {}
-    
-    with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Extract relevant fields
-            ident = row.get('ident', '').strip().upper()
-            
-            if not ident:
-                continue
-            
+        return True
+    return min(os.path.getmtime(path) for path in paths) >= os.path.getmtime(CACHE_FILE)
+
+
+def _save_array_cache(columns: Dict[str, np.ndarray]) -> None:
+    """Write the column arrays as .npy files (strings as fixed-width unicode)."""
+    os.makedirs(ARRAY_CACHE_DIR, exist_ok=True)
+    for name in _ARRAY_FILES:
+        array = columns[name]
+        if array.dtype == object:
+            array = array.astype(str)
+        path = os.path.join(ARRAY_CACHE_DIR, f"{name}.npy")
+        # Write-then-rename so another process never maps a half-written file
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+
+
+def _load_array_cache() -> Dict[str, np.ndarray]:
+    """Memory-map the cached .npy files; the OS shares their pages across processes."""
+    columns = {}
+    for name in _ARRAY_FILES:
+        path = os.path.join(ARRAY_CACHE_DIR, f"{name}.npy")
+        if hasattr(os, "posix_fadvise"):
+            # Ask the kernel to start reading the whole file in now
+            fd = os.open(path, os.O_RDONLY)
             try:
-                lat = float(row.get('latitude_deg', 0))
-                lon = float(row.get('longitude_deg', 0))
-            except (ValueError, TypeError):
-                continue
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        columns[name] = np.load(path, mmap_mode="r")
+    return columns
+
+
+def _build_grid(lat: np.ndarray, lon: np.ndarray) -> Dict[tuple, np.ndarray]:
+    """Bin rows into 1°×1° cells keyed by (floor(lat), floor(lon))."""
+    cell_lat = np.floor(lat).astype(np.int64)
+    cell_lon = np.floor(lon).astype(np.int64)
+    keys = (cell_lat + 90) * 361 + (cell_lon + 180)
+    
+    # A stable sort groups each cell's rows together, still in row order
+    order = np.argsort(keys, kind='stable')
+    cell_keys, starts = np.unique(keys[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    return {
+        (int(key) // 361 - 90, int(key) % 361 - 180): order[start:end]
+        for key, start, end in zip(cell_keys, starts, ends)
+    }
+
+
+def load_waypoint_database() -> int:
+    """
+    Load waypoint database into the column arrays. Uses, in order of
+    preference: the memory-mapped array cache, the parquet sidecar, the CSV.
+    Returns the number of waypoints loaded.
+    """
+    global _IDENT, _NAME, _TYPE_NAMES, _TYPE, _BY_TYPE, _LAT, _LON, _LAT_RAD, _LON_RAD, _FREQ, _COUNTRY, _REGION, _IDX, _TREE, _GRID, _LOADED
+    
+    if _array_cache_is_fresh():
+        print(f"📖 Loading waypoint database...")
+        columns = _load_array_cache()
+    else:
+        # Prefer the parquet sidecar unless the CSV has been replaced since it was written
+        if os.path.exists(PARQUET_FILE) and (
+            not os.path.exists(CACHE_FILE)
+            or os.path.getmtime(PARQUET_FILE) >= os.path.getmtime(CACHE_FILE)
+        ):
+            print(f"📖 Loading waypoint database...")
+            df = pl.read_parquet(PARQUET_FILE, columns=list(CSV_COLUMNS.values()))
+        else:
+            data = None
+            if not os.path.exists(CACHE_FILE):
+                data = download_waypoint_database()
             
-            waypoint = {
-                'ident': ident,
-                'name': row.get('name', ''),
-                'type': row.get('type', ''),  # VOR, NDB, DME, WAYPOINT, etc.
-                'lat': lat,
-                'lon': lon,
-                'frequency': row.get('frequency_khz', ''),
-                'country': row.get('iso_country', ''),
-                'region': row.get('iso_region', ''),
-            }
+            print(f"📖 Loading waypoint database...")
+            df = _parse_csv(data)
             
-            waypoints[ident] = waypoint
+            try:
+                df.write_parquet(PARQUET_FILE, compression="zstd")
+            except OSError as e:
+                print(f"⚠️  Could not write {PARQUET_FILE}: {e}")
+        
+        columns = _columns_from_frame(df)
+        try:
+            _save_array_cache(columns)
+        except OSError as e:
+            print(f"⚠️  Could not write {ARRAY_CACHE_DIR}: {e}")
+    
+    _IDENT = columns["ident"]
+    _NAME = columns["name"]
+    _TYPE_NAMES = columns["type_names"]
+    _TYPE = columns["type"]
+    _BY_TYPE = {str(name): np.flatnonzero(_TYPE == code) for code, name in enumerate(_TYPE_NAMES)}
+    _LAT = columns["lat"]
+    _LON = columns["lon"]
+    _LAT_RAD = columns["lat_rad"]
+    _LON_RAD = columns["lon_rad"]
+    _FREQ = columns["frequency"]
+    _COUNTRY = columns["country"]
+    _REGION = columns["region"]
+    _IDX = {ident: i for i, ident in enumerate(_IDENT.tolist())}
+    _TREE = cKDTree(_unit_vectors(_LAT_RAD, _LON_RAD)) if SCIPY_AVAILABLE else None
+    _GRID = _build_grid(_LAT, _LON)
+    
+    find_waypoint.cache_clear()
+    _LOADED = True
+    
+    print(f"✅ Loaded {len(_IDX):,} waypoints from database")
+    
+    return len(_IDX)
+
+
+def _ensure_loaded() -> None:
+    """Load the database on first use (thread-safe)."""
+    if _LOADED:
+        return
+    with _LOAD_LOCK:
+        if not _LOADED:
+            load_waypoint_database()
+
+
+# Below this many elements numexpr's setup costs more than it saves
+NUMEXPR_MIN_SIZE = 4096
+
+# Without Numba, corridor sweeps over at least this many candidates are split
+# across a thread pool
+PARALLEL_SWEEP_MIN_ROWS = 20000
+SWEEP_WORKERS = min(8, os.cpu_count() or 1)
+
+_HAVERSINE_EXPR = (
+    "R * 2 * arcsin(sqrt(sin((lat2 - lat1) / 2) ** 2 + "
+    "cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2))"
+)
+
+
+def _haversine_nm_array(lat1_rad, lon1_rad, lat2_rad, lon2_rad) -> np.ndarray:
+    """Great-circle distance in nautical miles; radians in, scalars or arrays."""
+    if NUMEXPR_AVAILABLE and max(np.size(lat1_rad), np.size(lat2_rad)) >= NUMEXPR_MIN_SIZE:
+        return numexpr.evaluate(_HAVERSINE_EXPR, local_dict={
+            "lat1": lat1_rad, "lon1": lon1_rad,
+            "lat2": lat2_rad, "lon2": lon2_rad,
+            "R": EARTH_RADIUS_NM,
+        })
+    a = (np.sin((lat2_rad - lat1_rad) / 2) ** 2 +
+         np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin((lon2_rad - lon1_rad) / 2) ** 2)
+    return EARTH_RADIUS_NM * 2 * np.arcsin(np.sqrt(a))
+
+
+@njit(cache=True, fastmath=True)
+def _haversine_nm(lat1_rad: float, lon1_rad: float, lat2_rad: float, lon2_rad: float) -> float:
+    """Scalar great-circle distance in nautical miles (radians in)."""
+    a = (math.sin((lat2_rad - lat1_rad) / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin((lon2_rad - lon1_rad) / 2) ** 2)
+    return EARTH_RADIUS_NM * 2 * math.asin(math.sqrt(a))
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _sweep_route(cand, lat, lon, lat_rad, lon_rad,
+                 origin_lat, origin_lon, dest_lat, dest_lon, corridor_width_nm):
+    """
+    Fused corridor sweep over the candidate rows (Numba kernel).
     
-    WAYPOINT_DATABASE = waypoints
-    print(f"✅ Loaded {len(waypoints):,} waypoints from database")
+    Does the same segment projection and haversine as the NumPy path in
+    find_waypoints_near_route, one row at a time, without the intermediate
+    arrays.
     
-    return waypoints
+    Returns:
+        (row indices, distance from route, distance from origin) for rows
+        within the corridor, in candidate order
+    """
+    n = cand.shape[0]
+    dlat = dest_lat - origin_lat
+    dlon = dest_lon - origin_lon
+    len_sq = dlat * dlat + dlon * dlon
+    
+    distance_from_route = np.empty(n)
+    for k in prange(n):
+        i = cand[k]
+        param = ((lat[i] - origin_lat) * dlat + (lon[i] - origin_lon) * dlon) / max(len_sq, 1e-30)
+        param = min(max(param, 0.0), 1.0)
+        closest_lat = origin_lat + param * dlat
+        closest_lon = origin_lon + param * dlon
+        
+        distance_from_route[k] = _haversine_nm(lat_rad[i], lon_rad[i],
+                                               math.radians(closest_lat), math.radians(closest_lon))
+    
+    # Count, then fill exactly-sized outputs
+    count = 0
+    for k in range(n):
+        if distance_from_route[k] <= corridor_width_nm:
+            count += 1
+    
+    idx = np.empty(count, dtype=np.int64)
+    d_route = np.empty(count)
+    d_origin = np.empty(count)
+    origin_lat_rad = math.radians(origin_lat)
+    origin_lon_rad = math.radians(origin_lon)
+    j = 0
+    for k in range(n):
+        if distance_from_route[k] <= corridor_width_nm:
+            i = cand[k]
+            idx[j] = i
+            d_route[j] = distance_from_route[k]
+            d_origin[j] = _haversine_nm(origin_lat_rad, origin_lon_rad, lat_rad[i], lon_rad[i])
+            j += 1
+    
+    return idx, d_route, d_origin
 
 
-def find_waypoint(ident: str) -> Optional[Dict]:
+def _sweep_route_numpy(cand: np.ndarray, origin_lat: float, origin_lon: float,
+                       dest_lat: float, dest_lon: float, corridor_width_nm: float):
     """
-    Find a waypoint by identifier (e.g., 'IGARI', 'VCENT')
+    NumPy version of _sweep_route, over the given candidate rows.
+    
+    Returns:
+        (row indices, distance from route, distance from origin) for rows
+        within the corridor, in candidate order
+    """
+    lat = _LAT[cand]
+    lon = _LON[cand]
+    
+    # Project every candidate onto the origin→destination segment (in lat/lon
+    # space) and measure the great-circle distance to that closest point
+    dlat = dest_lat - origin_lat
+    dlon = dest_lon - origin_lon
+    len_sq = dlat * dlat + dlon * dlon
+    
+    # Clamped to the segment; a zero-length segment gives param 0 (the origin)
+    param = np.clip(((lat - origin_lat) * dlat + (lon - origin_lon) * dlon) / max(len_sq, 1e-30),
+                    0.0, 1.0)
+    closest_lat = origin_lat + param * dlat
+    closest_lon = origin_lon + param * dlon
+    
+    distance_from_route = _haversine_nm_array(
+        _LAT_RAD[cand], _LON_RAD[cand],
+        np.radians(closest_lat), np.radians(closest_lon)
+    )
+    
+    # Find waypoints within corridor
+    in_corridor = distance_from_route <= corridor_width_nm
+    idx = cand[in_corridor]
+    distance_from_route = distance_from_route[in_corridor]
+    dist_from_origin = _haversine_nm_array(
+        np.radians(origin_lat), np.radians(origin_lon),
+        _LAT_RAD[idx], _LON_RAD[idx]
+    )
+    
+    return idx, distance_from_route, dist_from_origin
+
+
+def _unit_vectors(lat_rad, lon_rad) -> np.ndarray:
+    """(x, y, z) points on the unit sphere for latitudes/longitudes in radians."""
+    cos_lat = np.cos(lat_rad)
+    return np.stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)], axis=-1)
+
+
+def _chord_length(distance_nm) -> float:
+    """Unit-sphere chord length spanning a great-circle distance (KD-tree query radius)."""
+    angle = min(distance_nm / EARTH_RADIUS_NM, np.pi)
+    # Pad slightly so floating point never drops a point right on the boundary
+    return 2 * np.sin(angle / 2) * (1 + 1e-9) + 1e-12
+
+
+# Boxes covering more grid cells than this use the KD-tree (or a full scan)
+GRID_MAX_CELLS = 2500
+
+
+def _candidates_in_box(min_lat: float, max_lat: float,
+                       min_lon: float, max_lon: float) -> Optional[np.ndarray]:
+    """
+    Row indices that may lie inside a lat/lon box, in row order (a superset;
+    callers still apply the exact bounds). Uses the 1° grid for boxes up to
+    GRID_MAX_CELLS cells, then the KD-tree when available.
+    
+    Returns:
+        The candidate indices, or None if no index applies (scan every row)
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        return np.empty(0, dtype=np.intp)
+    
+    lat_cells = range(math.floor(min_lat), math.floor(max_lat) + 1)
+    lon_cells = range(math.floor(min_lon), math.floor(max_lon) + 1)
+    if len(lat_cells) * len(lon_cells) <= GRID_MAX_CELLS:
+        rows = [_GRID[(la, lo)] for la in lat_cells for lo in lon_cells if (la, lo) in _GRID]
+        if not rows:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(rows))
+    
+    if _TREE is None or max_lon - min_lon >= 180:
+        return None
+    
+    # The farthest point of the box from its centre is one of the corners,
+    # so a ball reaching the farthest corner covers the whole box
+    center_lat = np.radians((min_lat + max_lat) / 2)
+    center_lon = np.radians((min_lon + max_lon) / 2)
+    corners_lat = np.radians([min_lat, min_lat, max_lat, max_lat])
+    corners_lon = np.radians([min_lon, max_lon, min_lon, max_lon])
+    radius_nm = _haversine_nm_array(center_lat, center_lon, corners_lat, corners_lon).max()
+    
+    idx = _TREE.query_ball_point(_unit_vectors(center_lat, center_lon), r=_chord_length(radius_nm))
+    return np.sort(np.asarray(idx, dtype=np.intp))
+
+
+def _candidates_in_corridor_box(origin_lat: float, origin_lon: float,
+                                dest_lat: float, dest_lon: float,
+                                corridor_width_nm: float) -> np.ndarray:
+    """
+    Row indices inside the segment's lat/lon bounding box padded by the
+    corridor width (a superset of the corridor; no trig per row).
+    """
+    # A great-circle distance d is at least the latitude difference
+    lat_pad = np.degrees(corridor_width_nm / EARTH_RADIUS_NM)
+    lat_lo = min(origin_lat, dest_lat) - lat_pad
+    lat_hi = max(origin_lat, dest_lat) + lat_pad
+    mask = (_LAT >= lat_lo) & (_LAT <= lat_hi)
+    
+    # hav(d) >= cos(lat1)·cos(lat2)·hav(dlon), and both latitudes lie in the
+    # padded band, which bounds dlon unless the band reaches a pole
+    cos_min = np.cos(np.radians(min(max(abs(lat_lo), abs(lat_hi)), 90.0)))
+    hav_width = np.sin(min(corridor_width_nm / EARTH_RADIUS_NM, np.pi) / 2) ** 2
+    if cos_min > 0 and hav_width < cos_min ** 2:
+        lon_pad = np.degrees(2 * np.arcsin(np.sqrt(hav_width) / cos_min))
+        lon_lo = min(origin_lon, dest_lon) - lon_pad
+        lon_span = abs(dest_lon - origin_lon) + 2 * lon_pad
+        if lon_span < 360:
+            # Modulo 360 so matches across the antimeridian are kept
+            mask &= (_LON - lon_lo) % 360 <= lon_span
+    
+    return np.flatnonzero(mask)
+
+
+def _candidates_near_segment(origin_lat: float, origin_lon: float,
+                             dest_lat: float, dest_lon: float,
+                             corridor_width_nm: float) -> np.ndarray:
+    """
+    Row indices that may lie within corridor_width_nm of the origin→destination
+    segment (a superset). Uses the KD-tree when available, otherwise a
+    bounding-box test around the segment.
+    """
+    if _TREE is None:
+        return _candidates_in_corridor_box(origin_lat, origin_lon, dest_lat, dest_lon,
+                                           corridor_width_nm)
+    
+    # Sample the segment roughly every corridor width; any waypoint within the
+    # corridor is then within corridor_width + half a sample gap of a sample
+    approx_length_nm = 60 * np.hypot(dest_lat - origin_lat, dest_lon - origin_lon)
+    num_samples = int(np.clip(np.ceil(approx_length_nm / max(corridor_width_nm, 1.0)) + 1, 2, 256))
+    t = np.linspace(0.0, 1.0, num_samples)
+    sample_lat = np.radians(origin_lat + t * (dest_lat - origin_lat))
+    sample_lon = np.radians(origin_lon + t * (dest_lon - origin_lon))
+    
+    max_gap_nm = _haversine_nm_array(sample_lat[:-1], sample_lon[:-1],
+                                     sample_lat[1:], sample_lon[1:]).max()
+    radius = _chord_length(corridor_width_nm + max_gap_nm / 2)
+    
+    hits = _TREE.query_ball_point(_unit_vectors(sample_lat, sample_lon), r=radius)
+    if not any(len(h) for h in hits):
+        return np.empty(0, dtype=np.intp)
+    return np.unique(np.concatenate([np.asarray(h, dtype=np.intp) for h in hits]))
+
+
+# ── RESULT TYPES ──────────────────────────────────────────────────────────────
+
+@dataclass(slots=True, frozen=True)
+class Waypoint:
+    """
+    One waypoint from the database (immutable, so lookups can be cached).
+    Supports wp['ident'] / wp.get('region') as well as attribute access, so
+    code written against the old dict results keeps working.
+    """
+    ident: str
+    name: str
+    type: str
+    lat: float
+    lon: float
+    frequency: str
+    country: str
+    region: str
+    # Only set on results of find_waypoints_near_route
+    distance_from_origin_nm: Optional[float] = None
+    distance_from_route_nm: Optional[float] = None
+    
+    def __getitem__(self, key: str):
+        value = getattr(self, key, None) if key in _WAYPOINT_FIELDS else None
+        if value is None:
+            raise KeyError(key)
+        return value
+    
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def as_dict(self) -> Dict:
+        """Plain dict form (distance keys only present when set)."""
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+_WAYPOINT_FIELDS = frozenset(f.name for f in fields(Waypoint))
+
+
+def _row_to_waypoint(i: int, distance_from_origin_nm: Optional[float] = None,
+                     distance_from_route_nm: Optional[float] = None) -> Waypoint:
+    """Build the Waypoint for row i of the column arrays."""
+    # str() because memory-mapped string columns hold NumPy str_ scalars
+    return Waypoint(
+        ident=str(_IDENT[i]),
+        name=str(_NAME[i]),
+        type=str(_TYPE_NAMES[_TYPE[i]]),
+        lat=float(_LAT[i]),
+        lon=float(_LON[i]),
+        frequency=str(_FREQ[i]),
+        country=str(_COUNTRY[i]),
+        region=str(_REGION[i]),
+        distance_from_origin_nm=distance_from_origin_nm,
+        distance_from_route_nm=distance_from_route_nm,
+    )
+
+
+class WaypointView(Sequence):
+    """
+    Read-only sequence of query results over the column arrays. Each
+    Waypoint is only built when that item is accessed.
+    """
+    
+    __slots__ = ("_rows", "_from_origin", "_from_route")
+    
+    def __init__(self, rows: np.ndarray,
+                 distance_from_origin_nm: Optional[np.ndarray] = None,
+                 distance_from_route_nm: Optional[np.ndarray] = None):
+        self._rows = rows
+        self._from_origin = distance_from_origin_nm
+        self._from_route = distance_from_route_nm
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return WaypointView(
+                self._rows[k],
+                self._from_origin[k] if self._from_origin is not None else None,
+                self._from_route[k] if self._from_route is not None else None,
+            )
+        return _row_to_waypoint(
+            self._rows[k],
+            float(self._from_origin[k]) if self._from_origin is not None else None,
+            float(self._from_route[k]) if self._from_route is not None else None,
+        )
+    
+    def __repr__(self) -> str:
+        return f"WaypointView({len(self)} waypoints)"
+
+
+# ── QUERIES ───────────────────────────────────────────────────────────────────
+
+@functools.lru_cache(maxsize=4096)
+def find_waypoint(ident: str) -> Optional[Waypoint]:
+    """
+    Find a waypoint by identifier (e.g., 'IGARI', 'VCENT').
+    Results are cached; the cache is cleared whenever the database reloads.
     
     Args:
         ident: Waypoint identifier
     
     Returns:
-        Waypoint dict or None if not found
+        Waypoint or None if not found
     """
-    if not WAYPOINT_DATABASE:
-        load_waypoint_database()
+    _ensure_loaded()
     
-    return WAYPOINT_DATABASE.get(ident.upper())
+    i = _IDX.get(ident.upper())
+    return _row_to_waypoint(i) if i is not None else None
 
 
 def find_waypoints_in_region(min_lat: float, max_lat: float, 
                              min_lon: float, max_lon: float,
-                             waypoint_types: List[str] = None) -> List[Dict]:
+                             waypoint_types: List[str] = None) -> WaypointView:
     """
     Find all waypoints in a geographic region.
     
@@ -116,22 +688,37 @@ def find_waypoints_in_region(min_lat: float, max_lat: float,
     Returns:
         List of waypoints in the region
     """
-    if not WAYPOINT_DATABASE:
-        load_waypoint_database()
-    
-    results = []
-    
-    for wp in WAYPOINT_DATABASE.values():
-        if min_lat <= wp['lat'] <= max_lat and min_lon <= wp['lon'] <= max_lon:
-            if waypoint_types is None or wp['type'] in waypoint_types:
-                results.append(wp)
-    
-    return results
+    _ensure_loaded()
+    
+    idx = _candidates_in_box(min_lat, max_lat, min_lon, max_lon)
+    type_filtered = waypoint_types is None
+    
+    if idx is None and waypoint_types is not None:
+        # No spatial index for this box: start from the precomputed rows of
+        # the requested types rather than checking every row's type
+        type_rows = [_BY_TYPE[t] for t in set(waypoint_types) if t in _BY_TYPE]
+        if not type_rows:
+            return WaypointView(np.empty(0, dtype=np.intp))
+        idx = type_rows[0] if len(type_rows) == 1 else np.sort(np.concatenate(type_rows))
+        type_filtered = True
+    elif idx is None:
+        idx = np.arange(len(_IDENT))
+    
+    lat = _LAT[idx]
+    lon = _LON[idx]
+    
+    mask = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+    if not type_filtered:
+        wanted = np.flatnonzero(np.isin(_TYPE_NAMES, list(waypoint_types)))
+        mask &= np.isin(_TYPE[idx], wanted)
+    
+    return WaypointView(idx[mask])
 
 
 def find_waypoints_near_route(origin_lat: float, origin_lon: float,
                               dest_lat: float, dest_lon: float,
-                              corridor_width_nm: float = 100) -> List[Dict]:
+                              corridor_width_nm: float = 100,
+                              max_results: Optional[int] = None) -> WaypointView:
     """
     Find waypoints along a route corridor.
     
@@ -139,89 +726,58 @@ def find_waypoints_near_route(origin_lat: float, origin_lon: float,
         origin_lat, origin_lon: Origin coordinates
         dest_lat, dest_lon: Destination coordinates
         corridor_width_nm: Width of search corridor in nautical miles
+        max_results: If set, return only this many waypoints (the ones
+                     closest to the origin)
     
     Returns:
         List of waypoints along the route
     """
-    import math
+    _ensure_loaded()
     
-    if not WAYPOINT_DATABASE:
-        load_waypoint_database()
-    
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        return 3440.065 * c  # nautical miles
-    
-    def point_to_line_distance(px, py, x1, y1, x2, y2):
-        """Calculate perpendicular distance from point to line"""
-        A = px - x1
-        B = py - y1
-        C = x2 - x1
-        D = y2 - y1
-        
-        dot = A * C + B * D
-        len_sq = C * C + D * D
-        
-        if len_sq == 0:
-            return haversine_distance(px, py, x1, y1)
-        
-        param = dot / len_sq
-        
-        if param < 0:
-            xx = x1
-            yy = y1
-        elif param > 1:
-            xx = x2
-            yy = y2
-        else:
-            xx = x1 + param * C
-            yy = y1 + param * D
-        
-        return haversine_distance(px, py, xx, yy)
-    
-    # Find waypoints within corridor
-    route_waypoints = []
-    
-    for wp in WAYPOINT_DATABASE.values():
-        # Calculate distance from waypoint to route line
-        distance_from_route = point_to_line_distance(
-            wp['lat'], wp['lon'],
-            origin_lat, origin_lon,
-            dest_lat, dest_lon
+    cand = _candidates_near_segment(origin_lat, origin_lon, dest_lat, dest_lon, corridor_width_nm)
+    if NUMBA_AVAILABLE:
+        idx, distance_from_route, dist_from_origin = _sweep_route(
+            cand, _LAT, _LON, _LAT_RAD, _LON_RAD,
+            origin_lat, origin_lon, dest_lat, dest_lon, corridor_width_nm
+        )
+    elif not NUMEXPR_AVAILABLE and len(cand) >= PARALLEL_SWEEP_MIN_ROWS and SWEEP_WORKERS > 1:
+        # NumPy's ufuncs release the GIL, so disjoint chunks sweep in parallel;
+        # concatenating in chunk order keeps the candidate order
+        # (numexpr, when installed, already spreads its work across threads)
+        chunks = np.array_split(cand, SWEEP_WORKERS)
+        with ThreadPoolExecutor(max_workers=SWEEP_WORKERS) as executor:
+            parts = list(executor.map(
+                lambda chunk: _sweep_route_numpy(chunk, origin_lat, origin_lon,
+                                                 dest_lat, dest_lon, corridor_width_nm),
+                chunks
+            ))
+        idx, distance_from_route, dist_from_origin = (np.concatenate(p) for p in zip(*parts))
+    else:
+        idx, distance_from_route, dist_from_origin = _sweep_route_numpy(
+            cand, origin_lat, origin_lon, dest_lat, dest_lon, corridor_width_nm
         )
-        
-        if distance_from_route <= corridor_width_nm:
-            # Calculate distance from origin
-            dist_from_origin = haversine_distance(
-                origin_lat, origin_lon,
-                wp['lat'], wp['lon']
-            )
-            
-            route_waypoints.append({
-                **wp,
-                'distance_from_origin_nm': round(dist_from_origin, 1),
-                'distance_from_route_nm': round(distance_from_route, 1)
-            })
     
     # Sort by distance from origin
-    route_waypoints.sort(key=lambda x: x['distance_from_origin_nm'])
-    
-    return route_waypoints
+    if max_results is not None and max_results <= 0:
+        order = np.empty(0, dtype=np.intp)
+    elif max_results is not None and max_results < len(idx):
+        # Partition out the nearest max_results and sort only those; they go
+        # back into row order first so ties keep database order, as in the full sort
+        nearest = np.sort(np.argpartition(dist_from_origin, max_results - 1)[:max_results])
+        order = nearest[np.argsort(dist_from_origin[nearest], kind='stable')]
+    else:
+        order = np.argsort(dist_from_origin, kind='stable')
+    
+    return WaypointView(
+        idx[order],
+        np.round(dist_from_origin[order], 1),
+        np.round(distance_from_route[order], 1),
+    )
 
 
 def generate_realistic_route(origin_lat: float, origin_lon: float,
                             dest_lat: float, dest_lon: float,
-                            num_waypoints: int = 5) -> List[Dict]:
+                            num_waypoints: int = 5) -> List[Waypoint]:
     """
     Generate a realistic route using actual waypoints from the database.
     
@@ -244,42 +800,44 @@ def generate_realistic_route(origin_lat: float, origin_lon: float,
         return []
     
     # Calculate total route distance
-    import math
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        return 3440.065 * c
-    
-    total_distance = haversine_distance(origin_lat, origin_lon, dest_lat, dest_lon)
-    
-    # Select waypoints at regular intervals
+    total_distance = _haversine_nm(math.radians(origin_lat), math.radians(origin_lon),
+                                   math.radians(dest_lat), math.radians(dest_lon))
+    
+    # Select waypoints at regular intervals, comparing the 0.1 nm distances
+    # reported on each waypoint. Candidates are sorted by true distance from
+    # origin, so these rounded values are non-decreasing and the closest one
+    # to each target is found by bisection
+    distances = candidates._from_origin.tolist()
     selected_waypoints = []
+    selected_indices = set()
     segment_distance = total_distance / (num_waypoints + 1)
     
     for i in range(1, num_waypoints + 1):
         target_distance = segment_distance * i
         
-        # Find closest waypoint to target distance
-        closest_wp = min(
-            candidates,
-            key=lambda wp: abs(wp['distance_from_origin_nm'] - target_distance)
-        )
+        # Closest waypoint is either the last one before the target or the
+        # first one at/after it. Candidates whose rounded distances tie
+        # resolve to the earliest, i.e. the nearer by true distance (database
+        # order only if those are equal too), as min() over the list did
+        after = bisect_left(distances, target_distance)
+        closest = after
+        if after == len(distances) or (
+            after > 0
+            and abs(distances[after - 1] - target_distance) <= abs(distances[after] - target_distance)
+        ):
+            closest = bisect_left(distances, distances[after - 1])
         
-        if closest_wp not in selected_waypoints:
-            selected_waypoints.append(closest_wp)
+        if closest not in selected_indices:
+            selected_indices.add(closest)
+            selected_waypoints.append(candidates[closest])
     
     return selected_waypoints[:num_waypoints]
 
 
+if os.environ.get("FLIGHT_PLANNER_EAGER") == "1":
+    _ensure_loaded()
+
+
 # ── QUICK TEST ────────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
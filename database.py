@@ -4,27 +4,228 @@
 
 import sqlite3
 import hashlib
+import hmac
 import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
 from datetime import datetime
-from typing import Optional, List, Dict
+from functools import lru_cache
+from typing import Optional, Iterator, List, Dict
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+# orjson is optional: it encodes/decodes the plan JSON columns several times
+# faster than the standard library
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# zstandard is optional: large plan JSON columns are stored compressed
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# JSON shorter than this is stored as plain text; the zstd frame overhead
+# outweighs the saving on small values
+ZSTD_MIN_BYTES = 512
+ZSTD_LEVEL = 3
+
+# zstd compressor/decompressor objects are not safe to share across threads
+_zstd_local = threading.local()
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to a JSON string for a TEXT column"""
+    if ORJSON_AVAILABLE:
+        # Non-string dict keys are stringified, as json.dumps does
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+def _json_loads(text: str):
+    """Parse a JSON TEXT column"""
+    return orjson.loads(text) if ORJSON_AVAILABLE else json.loads(text)
+
+
+def _encode_json_column(obj):
+    """
+    Serialize a plan JSON column value for storage
+    
+    Returns:
+        JSON text, or zstd-compressed UTF-8 JSON bytes when zstandard is
+        installed and the text is at least ZSTD_MIN_BYTES long
+    """
+    text = _json_dumps(obj)
+    if not ZSTD_AVAILABLE or len(text) < ZSTD_MIN_BYTES:
+        return text
+    
+    compressor = getattr(_zstd_local, "compressor", None)
+    if compressor is None:
+        compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor.compress(text.encode())
+
+
+def _decode_json_column(value):
+    """Parse a plan JSON column: compressed bytes or JSON text"""
+    if isinstance(value, bytes):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is required to read compressed flight plan data")
+        decompressor = getattr(_zstd_local, "decompressor", None)
+        if decompressor is None:
+            decompressor = _zstd_local.decompressor = zstandard.ZstdDecompressor()
+        value = decompressor.decompress(value)
+    return _json_loads(value)
 
 # Database file
 DB_PATH = "flight_planner.db"
 
 
+# Argon2id, sized to stay well under 100 ms per login
+_ph = PasswordHasher(time_cost=3, memory_cost=7168, parallelism=1)
+
+
+# ── CONNECTION POOL ───────────────────────────────────────────────────────────
+
+class _ConnectionPool:
+    """
+    Reusable SQLite connections: one shared write connection, used by one
+    caller at a time, and up to max_readers read connections handed out
+    through a queue. Connections are opened on first use and kept open.
+    """
+    
+    def __init__(self, db_path: str, max_readers: int):
+        self.db_path = db_path
+        self.max_readers = max_readers
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_count_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Pooled connections live for the whole process, so give each a larger
+        # prepared-statement cache (default 128) to keep every query compiled
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        # PRAGMAs are per-connection, so every pooled connection runs them.
+        # WAL lets readers proceed while the writer commits.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")     # 64 MiB
+        conn.execute("PRAGMA mmap_size=268435456")   # 256 MiB
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _checkout_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_count_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                return self._connect()
+        # Pool is full; wait for a reader to come back
+        return self._readers.get()
+    
+    @contextmanager
+    def read(self):
+        conn = self._checkout_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    @contextmanager
+    def write(self):
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+
+_pool: Optional[_ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> _ConnectionPool:
+    """The process-wide pool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _ConnectionPool(DB_PATH, max_readers=os.cpu_count() or 5)
+    return _pool
+
+
+def read_conn():
+    """Context manager that lends out a pooled connection for SELECTs"""
+    return _get_pool().read()
+
+
+def write_conn():
+    """
+    Context manager that lends out the pooled write connection. Commits when
+    the block exits normally and rolls back if it raises.
+    """
+    return _get_pool().write()
+
+
 # ── HELPER FUNCTIONS ──────────────────────────────────────────────────────────
 
 def hash_password(password: str) -> str:
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password using Argon2id (salt and parameters are embedded in the hash)"""
+    return _ph.hash(password)
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    """
+    Check a password against a stored hash.
+    
+    Accepts Argon2 hashes and the unsalted SHA-256 hex digests written by
+    older versions (those are upgraded on the next successful login).
+    """
+    if stored_hash.startswith("$argon2"):
+        try:
+            return _ph.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    
+    legacy_hash = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(stored_hash, legacy_hash)
+
+
+def password_needs_rehash(stored_hash: str) -> bool:
+    """True if the stored hash is legacy SHA-256 or uses outdated Argon2 parameters"""
+    return not stored_hash.startswith("$argon2") or _ph.check_needs_rehash(stored_hash)
 
 
 # ── DATABASE INITIALIZATION ───────────────────────────────────────────────────
 
 def init_database():
     """Initialize database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    with write_conn() as conn:
+        _create_tables(conn.cursor())
+    print("✅ Database initialized successfully")
+
+
+def _create_tables(cursor: sqlite3.Cursor):
+    """Run the CREATE TABLE statements on the given cursor"""
     
     # Users table
     cursor.execute("""
@@ -54,10 +255,12 @@ def init_database():
             headwind_kt REAL,
             fuel_required_kg REAL,
             flight_time_hr REAL,
-            route_data TEXT,
-            weather_data TEXT,
-            airspace_check TEXT,
-            etops_check TEXT,
+            route_data BLOB,
+            weather_data BLOB,
+            airspace_check BLOB,
+            etops_check BLOB,
+            etops_compliant BOOLEAN,
+            has_airspace_violation BOOLEAN,
             status TEXT DEFAULT 'draft',
             approved BOOLEAN DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -95,9 +298,36 @@ def init_database():
         )
     """)
     
-    conn.commit()
-    conn.close()
-    print("✅ Database initialized successfully")
+    # Indexes for the per-user lookups (users.username and users.email are
+    # already indexed by their UNIQUE constraints)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_plans_user_created
+        ON flight_plans(user_id, created_at DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_plans_user_aircraft
+        ON flight_plans(user_id, aircraft_code)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user
+        ON flight_history(user_id)
+    """)
+    
+    # Safety-check results lifted out of the JSON columns. Added after the
+    # first release, so older databases get them here (CREATE TABLE IF NOT
+    # EXISTS leaves an existing table as it was)
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(flight_plans)")}
+    for column in ('etops_compliant', 'has_airspace_violation'):
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE flight_plans ADD COLUMN {column} BOOLEAN")
+    
+    # Partial index: only plans that failed a safety check, per user, in
+    # listing order
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_plans_violations
+        ON flight_plans(user_id, created_at DESC)
+        WHERE {_VIOLATION_FILTER}
+    """)
 
 
 # ── USER MANAGEMENT ───────────────────────────────────────────────────────────
@@ -106,26 +336,27 @@ def create_user(username: str, email: str, password: str,
                full_name: str = None, pilot_license: str = None) -> Dict:
     """Create a new user account"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
+        # Hash before taking the write connection; Argon2 is deliberately slow
         password_hash = hash_password(password)
         
-        cursor.execute("""
-            INSERT INTO users (username, email, password_hash, full_name, pilot_license)
-            VALUES (?, ?, ?, ?, ?)
-        """, (username, email, password_hash, full_name, pilot_license))
-        
-        user_id = cursor.lastrowid
-        
-        # Create default preferences
-        cursor.execute("""
-            INSERT INTO user_preferences (user_id)
-            VALUES (?)
-        """, (user_id,))
+        with write_conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO users (username, email, password_hash, full_name, pilot_license)
+                VALUES (?, ?, ?, ?, ?)
+            """, (username, email, password_hash, full_name, pilot_license))
+            
+            user_id = cursor.lastrowid
+            
+            # Create default preferences
+            cursor.execute("""
+                INSERT INTO user_preferences (user_id)
+                VALUES (?)
+            """, (user_id,))
         
-        conn.commit()
-        conn.close()
+        # A lookup of this id may have cached "no such user"
+        _get_user_by_id_cached.cache_clear()
         
         return {
             "success": True,
@@ -145,143 +376,263 @@ def create_user(username: str, email: str, password: str,
         }
 
 
+# UPDATE ... RETURNING needs SQLite 3.35+
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_USER_COLUMNS = "user_id, username, email, full_name, pilot_license, created_at"
+
+# Only touches the row while it still holds the hash that was verified
+_TOUCH_LOGIN_SQL = """
+    UPDATE users SET last_login = CURRENT_TIMESTAMP, password_hash = ?
+    WHERE user_id = ? AND password_hash = ?
+"""
+_TOUCH_LOGIN_RETURNING_SQL = _TOUCH_LOGIN_SQL + f"RETURNING {_USER_COLUMNS}"
+_SELECT_USER_SQL = f"SELECT {_USER_COLUMNS} FROM users WHERE user_id = ?"
+
+
 def authenticate_user(username: str, password: str) -> Optional[Dict]:
     """Authenticate user with username and password"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        password_hash = hash_password(password)
-        
-        cursor.execute("""
-            SELECT user_id, username, email, full_name, pilot_license, created_at
-            FROM users
-            WHERE username = ? AND password_hash = ?
-        """, (username, password_hash))
-        
-        result = cursor.fetchone()
-        
-        if result:
-            # Update last login
-            cursor.execute("""
-                UPDATE users SET last_login = CURRENT_TIMESTAMP
-                WHERE user_id = ?
-            """, (result[0],))
-            conn.commit()
-            
-            conn.close()
-            
-            return {
-                "user_id": result[0],
-                "username": result[1],
-                "email": result[2],
-                "full_name": result[3],
-                "pilot_license": result[4],
-                "created_at": result[5]
-            }
-        
-        conn.close()
-        return None
+        with read_conn() as conn:
+            result = conn.execute("""
+                SELECT user_id, password_hash
+                FROM users
+                WHERE username = ?
+            """, (username,)).fetchone()
+        
+        if not result:
+            return None
+        
+        user_id, stored_hash = result
+        if not verify_password(stored_hash, password):
+            return None
+        
+        # Upgrade the stored hash if it is outdated (hashed before taking the
+        # write lock, since Argon2 is deliberately slow)
+        new_hash = hash_password(password) if password_needs_rehash(stored_hash) else stored_hash
+        
+        # Update last login and read the user back in the same write; no row
+        # means the password changed after it was verified
+        with write_conn() as conn:
+            params = (new_hash, user_id, stored_hash)
+            if _SQLITE_HAS_RETURNING:
+                user = conn.execute(_TOUCH_LOGIN_RETURNING_SQL, params).fetchone()
+            else:
+                touched = conn.execute(_TOUCH_LOGIN_SQL, params).rowcount
+                user = conn.execute(_SELECT_USER_SQL, (user_id,)).fetchone() if touched else None
+        
+        return dict(user) if user else None
     
     except Exception as e:
         print(f"Authentication error: {e}")
         return None
 
 
-def get_user_by_id(user_id: int) -> Optional[Dict]:
-    """Get user information by ID"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+# Cached user rows expire when the minute bucket rolls over
+USER_CACHE_TTL_SECONDS = 60
+
+
+@lru_cache(maxsize=1024)
+def _get_user_by_id_cached(user_id: int, bucket: int) -> Optional[Dict]:
+    """User row lookup, cached per (user_id, time bucket); errors propagate uncached"""
+    with read_conn() as conn:
+        result = conn.execute("""
             SELECT user_id, username, email, full_name, pilot_license, created_at
             FROM users
             WHERE user_id = ?
-        """, (user_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return {
-                "user_id": result[0],
-                "username": result[1],
-                "email": result[2],
-                "full_name": result[3],
-                "pilot_license": result[4],
-                "created_at": result[5]
-            }
-        return None
+        """, (user_id,)).fetchone()
+    
+    return dict(result) if result else None
+
+
+def get_user_by_id(user_id: int) -> Optional[Dict]:
+    """Get user information by ID (cached for up to USER_CACHE_TTL_SECONDS)"""
+    try:
+        user = _get_user_by_id_cached(user_id, int(time.time()) // USER_CACHE_TTL_SECONDS)
+        # Copy so callers can't modify the cached dict
+        return dict(user) if user else None
     
     except Exception as e:
         print(f"Error fetching user: {e}")
         return None
 
 
+# ── RESULT TYPES ──────────────────────────────────────────────────────────────
+
+@dataclass(slots=True)
+class FlightPlanRow:
+    """
+    One flight plan summary from get_user_flight_plans. Supports
+    plan['plan_name'] / plan.get('status') as well as attribute access, so
+    code written against the old dict results keeps working.
+    """
+    plan_id: int
+    plan_name: Optional[str]
+    aircraft_code: str
+    origin_icao: str
+    destination_icao: str
+    distance_nm: Optional[float]
+    status: Optional[str]
+    approved: Optional[int]
+    created_at: Optional[str]
+    
+    def __getitem__(self, key: str):
+        if key not in _FLIGHT_PLAN_ROW_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def as_dict(self) -> Dict:
+        """Plain dict form"""
+        return asdict(self)
+
+
+_FLIGHT_PLAN_ROW_FIELDS = frozenset(f.name for f in fields(FlightPlanRow))
+
+
 # ── FLIGHT PLAN MANAGEMENT ────────────────────────────────────────────────────
 
-def save_flight_plan(user_id: int, plan_data: Dict) -> Dict:
-    """Save a flight plan"""
+_INSERT_PLAN_SQL = """
+    INSERT INTO flight_plans (
+        user_id, plan_name, aircraft_code, origin_icao, destination_icao,
+        distance_nm, altitude_ft, headwind_kt, fuel_required_kg, flight_time_hr,
+        route_data, weather_data, airspace_check, etops_check,
+        etops_compliant, has_airspace_violation, status, approved
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Plans that failed the ETOPS or airspace check; also the predicate of the
+# idx_plans_violations partial index, so queries using it can seek that index
+_VIOLATION_FILTER = "(etops_compliant = 0 OR has_airspace_violation = 1)"
+
+
+def _safety_flags(plan_data: Dict) -> tuple:
+    """
+    (etops_compliant, has_airspace_violation) from the plan's check results,
+    None where a result is missing or has no verdict
+    """
+    etops = plan_data.get('etops_check')
+    airspace = plan_data.get('airspace_check')
+    etops_compliant = (bool(etops['compliant'])
+                       if isinstance(etops, dict) and 'compliant' in etops else None)
+    has_violation = (not airspace['route_clear']
+                     if isinstance(airspace, dict) and 'route_clear' in airspace else None)
+    return etops_compliant, has_violation
+
+
+def _plan_params(user_id: int, plan_data: Dict) -> tuple:
+    """Parameters for _INSERT_PLAN_SQL from a plan dict"""
+    return (
+        user_id,
+        plan_data.get('plan_name'),
+        plan_data.get('aircraft_code'),
+        plan_data.get('origin_icao'),
+        plan_data.get('destination_icao'),
+        plan_data.get('distance_nm'),
+        plan_data.get('altitude_ft'),
+        plan_data.get('headwind_kt'),
+        plan_data.get('fuel_required_kg'),
+        plan_data.get('flight_time_hr'),
+        _encode_json_column(plan_data.get('route_data')),
+        _encode_json_column(plan_data.get('weather_data')),
+        _encode_json_column(plan_data.get('airspace_check')),
+        _encode_json_column(plan_data.get('etops_check')),
+        *_safety_flags(plan_data),
+        plan_data.get('status', 'draft'),
+        plan_data.get('approved', False)
+    )
+
+
+def save_flight_plans_bulk(user_id: int, plans: List[Dict]) -> Dict:
+    """Save several flight plans in a single transaction"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        rows = [_plan_params(user_id, plan_data) for plan_data in plans]
+        if not rows:
+            return {"success": True, "plan_ids": []}
         
-        cursor.execute("""
-            INSERT INTO flight_plans (
-                user_id, plan_name, aircraft_code, origin_icao, destination_icao,
-                distance_nm, altitude_ft, headwind_kt, fuel_required_kg, flight_time_hr,
-                route_data, weather_data, airspace_check, etops_check, status, approved
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_id,
-            plan_data.get('plan_name'),
-            plan_data.get('aircraft_code'),
-            plan_data.get('origin_icao'),
-            plan_data.get('destination_icao'),
-            plan_data.get('distance_nm'),
-            plan_data.get('altitude_ft'),
-            plan_data.get('headwind_kt'),
-            plan_data.get('fuel_required_kg'),
-            plan_data.get('flight_time_hr'),
-            json.dumps(plan_data.get('route_data')),
-            json.dumps(plan_data.get('weather_data')),
-            json.dumps(plan_data.get('airspace_check')),
-            json.dumps(plan_data.get('etops_check')),
-            plan_data.get('status', 'draft'),
-            plan_data.get('approved', False)
-        ))
+        with write_conn() as conn:
+            conn.executemany(_INSERT_PLAN_SQL, rows)
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
         
-        plan_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        # The rows went in back to back on the single write connection within
+        # one transaction, so their AUTOINCREMENT ids are consecutive
+        plan_ids = list(range(last_id - len(rows) + 1, last_id + 1))
         
-        return {"success": True, "plan_id": plan_id}
+        return {"success": True, "plan_ids": plan_ids}
     
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
-def get_user_flight_plans(user_id: int, limit: int = 50) -> List[Dict]:
-    """Get all flight plans for a user"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+def save_flight_plan(user_id: int, plan_data: Dict) -> Dict:
+    """Save a flight plan"""
+    result = save_flight_plans_bulk(user_id, [plan_data])
+    if not result["success"]:
+        return result
+    
+    return {"success": True, "plan_id": result["plan_ids"][0]}
+
+
+_LIST_PLANS_SQL = """
+    SELECT plan_id, plan_name, aircraft_code, origin_icao, destination_icao,
+           distance_nm, status, approved, created_at
+    FROM flight_plans
+    WHERE user_id = ?{}
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+_LIST_VIOLATING_PLANS_SQL = _LIST_PLANS_SQL.format(f" AND {_VIOLATION_FILTER}")
+_LIST_PLANS_SQL = _LIST_PLANS_SQL.format("")
+
+
+def iter_user_flight_plans(user_id: int, limit: Optional[int] = None,
+                           batch_size: int = 200,
+                           violations_only: bool = False) -> Iterator[FlightPlanRow]:
+    """
+    Stream a user's flight plans, newest first
+    
+    Rows are fetched batch_size at a time, so only one batch is held in
+    memory. The pooled read connection stays checked out until the
+    generator is exhausted or closed.
+    
+    Args:
+        user_id: Owner of the plans
+        limit: Maximum number of plans (None for all)
+        batch_size: Rows fetched per round-trip
+        violations_only: Only plans that failed the ETOPS or airspace check
+    
+    Returns:
+        Iterator of FlightPlanRow
+    """
+    with read_conn() as conn:
+        # Plain tuples, unpacked positionally into FlightPlanRow (column
+        # order matches its fields)
         cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT plan_id, plan_name, aircraft_code, origin_icao, destination_icao,
-                   distance_nm, status, approved, created_at
-            FROM flight_plans
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (user_id, limit))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in results]
+        cursor.row_factory = None
+        cursor.execute(_LIST_VIOLATING_PLANS_SQL if violations_only else _LIST_PLANS_SQL,
+                       (user_id, -1 if limit is None else limit))
+        
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield FlightPlanRow(*row)
+        finally:
+            cursor.close()
+
+
+def get_user_flight_plans(user_id: int, limit: int = 50,
+                          violations_only: bool = False) -> List[FlightPlanRow]:
+    """Get all flight plans for a user (or only those that failed a safety check)"""
+    try:
+        return list(iter_user_flight_plans(user_id, limit, violations_only=violations_only))
     
     except Exception as e:
         print(f"Error fetching flight plans: {e}")
@@ -291,28 +642,17 @@ def get_user_flight_plans(user_id: int, limit: int = 50) -> List[Dict]:
 def get_flight_plan_by_id(plan_id: int) -> Optional[Dict]:
     """Get a specific flight plan"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM flight_plans WHERE plan_id = ?
-        """, (plan_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with read_conn() as conn:
+            result = conn.execute("""
+                SELECT * FROM flight_plans WHERE plan_id = ?
+            """, (plan_id,)).fetchone()
         
         if result:
             plan = dict(result)
-            # Parse JSON fields
-            if plan.get('route_data'):
-                plan['route_data'] = json.loads(plan['route_data'])
-            if plan.get('weather_data'):
-                plan['weather_data'] = json.loads(plan['weather_data'])
-            if plan.get('airspace_check'):
-                plan['airspace_check'] = json.loads(plan['airspace_check'])
-            if plan.get('etops_check'):
-                plan['etops_check'] = json.loads(plan['etops_check'])
+            # Parse JSON fields (zstd-compressed or plain text)
+            for key in ('route_data', 'weather_data', 'airspace_check', 'etops_check'):
+                if plan[key]:
+                    plan[key] = _decode_json_column(plan[key])
             return plan
         return None
     
@@ -324,17 +664,13 @@ def get_flight_plan_by_id(plan_id: int) -> Optional[Dict]:
 def delete_flight_plan(plan_id: int, user_id: int) -> Dict:
     """Delete a flight plan"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            DELETE FROM flight_plans
-            WHERE plan_id = ? AND user_id = ?
-        """, (plan_id, user_id))
-        
-        deleted = cursor.rowcount
-        conn.commit()
-        conn.close()
+        with write_conn() as conn:
+            cursor = conn.execute("""
+                DELETE FROM flight_plans
+                WHERE plan_id = ? AND user_id = ?
+            """, (plan_id, user_id))
+            
+            deleted = cursor.rowcount
         
         if deleted > 0:
             return {"success": True}
@@ -350,43 +686,31 @@ def delete_flight_plan(plan_id: int, user_id: int) -> Dict:
 def get_user_statistics(user_id: int) -> Dict:
     """Get user statistics"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Total plans
-        cursor.execute("""
-            SELECT COUNT(*), SUM(distance_nm), 
-                   SUM(CASE WHEN approved = 1 THEN 1 ELSE 0 END)
-            FROM flight_plans
-            WHERE user_id = ?
-        """, (user_id,))
-        
-        result = cursor.fetchone()
-        total_plans = result[0] or 0
-        total_distance = result[1] or 0
-        approved_plans = result[2] or 0
-        
-        # Most used aircraft
-        cursor.execute("""
-            SELECT aircraft_code, COUNT(*) as count
-            FROM flight_plans
-            WHERE user_id = ?
-            GROUP BY aircraft_code
-            ORDER BY count DESC
-            LIMIT 1
-        """, (user_id,))
-        
-        aircraft_result = cursor.fetchone()
-        most_used_aircraft = aircraft_result[0] if aircraft_result else None
-        
-        # Flight history count
-        cursor.execute("""
-            SELECT COUNT(*) FROM flight_history WHERE user_id = ?
-        """, (user_id,))
-        
-        flights_logged = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        with read_conn() as conn:
+            cursor = conn.cursor()
+            
+            # Plan totals, most used aircraft and the flight history count
+            # in one round-trip
+            cursor.execute("""
+                SELECT COUNT(*), SUM(distance_nm), 
+                       SUM(CASE WHEN approved = 1 THEN 1 ELSE 0 END),
+                       (SELECT COUNT(*) FROM flight_history WHERE user_id = ?),
+                       (SELECT aircraft_code
+                        FROM flight_plans
+                        WHERE user_id = ?
+                        GROUP BY aircraft_code
+                        ORDER BY COUNT(*) DESC
+                        LIMIT 1)
+                FROM flight_plans
+                WHERE user_id = ?
+            """, (user_id, user_id, user_id))
+            
+            result = cursor.fetchone()
+            total_plans = result[0] or 0
+            total_distance = result[1] or 0
+            approved_plans = result[2] or 0
+            flights_logged = result[3] or 0
+            most_used_aircraft = result[4]
         
         return {
             "total_plans": total_plans,
@@ -404,26 +728,22 @@ def get_user_statistics(user_id: int) -> Dict:
 def log_actual_flight(user_id: int, plan_id: int, flight_data: Dict) -> Dict:
     """Log an actual flight"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO flight_history (
-                user_id, plan_id, flight_date, actual_fuel_used_kg,
-                actual_flight_time_hr, notes
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            user_id,
-            plan_id,
-            flight_data.get('flight_date'),
-            flight_data.get('actual_fuel_used_kg'),
-            flight_data.get('actual_flight_time_hr'),
-            flight_data.get('notes')
-        ))
+        with write_conn() as conn:
+            cursor = conn.execute("""
+                INSERT INTO flight_history (
+                    user_id, plan_id, flight_date, actual_fuel_used_kg,
+                    actual_flight_time_hr, notes
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                user_id,
+                plan_id,
+                flight_data.get('flight_date'),
+                flight_data.get('actual_fuel_used_kg'),
+                flight_data.get('actual_flight_time_hr'),
+                flight_data.get('notes')
+            ))
         
         flight_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         return {"success": True, "flight_id": flight_id}
     
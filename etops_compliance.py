@@ -2,8 +2,24 @@
 # ETOPS (Extended-range Twin-engine Operational Performance Standards) Compliance Checker
 # Verifies that twin-engine aircraft have suitable diversion airports within required time limits
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+import functools
 import math
+
+import numpy as np
+
+# SciPy is optional: with it, nearest-diversion lookups use a KD-tree over
+# the ETOPS airports instead of a full waypoints x airports distance matrix
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Numba is optional: with it, haversine_distance is JIT-compiled and the
+# nearest-diversion search runs as one fused, parallel kernel
+from numba_compat import njit, prange, NUMBA_AVAILABLE
+
 from airport_database import AIRPORTS, lookup_airport
 from aircraft_database import AIRCRAFT_DATABASE, lookup_aircraft
 
@@ -62,6 +78,7 @@ ETOPS_SUITABLE_AIRPORTS = {
 
 # ── DISTANCE CALCULATIONS ─────────────────────────────────────────────────────
 
+@njit(cache=True, fastmath=True)
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate distance in nautical miles"""
     lat1_rad = math.radians(lat1)
@@ -79,8 +96,205 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return earth_radius_nm * c
 
 
+def _haversine_nm(lat1_rad, lon1_rad, lat2_rad, lon2_rad) -> np.ndarray:
+    """Vectorized haversine_distance on radian arrays (broadcasts)"""
+    dlat = lat2_rad - lat1_rad
+    dlon = lon2_rad - lon1_rad
+    
+    a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
+    return 3440.065 * (2 * np.arcsin(np.sqrt(a)))
+
+
+def _initial_bearing(lat1_rad, lon1_rad, lat2_rad, lon2_rad) -> np.ndarray:
+    """Vectorized initial great-circle bearing (radians) from point 1 to point 2"""
+    dlon = lon2_rad - lon1_rad
+    return np.arctan2(np.sin(dlon) * np.cos(lat2_rad),
+                      np.cos(lat1_rad) * np.sin(lat2_rad)
+                      - np.sin(lat1_rad) * np.cos(lat2_rad) * np.cos(dlon))
+
+
+def _distance_from_segment_nm(lat1_rad: float, lon1_rad: float, lat2_rad: float, lon2_rad: float,
+                              lat_rad, lon_rad, from_start_nm, from_end_nm) -> np.ndarray:
+    """
+    Vectorized great-circle distance from points to the route segment 1 -> 2.
+    
+    Uses the spherical cross-track distance where the point projects onto
+    the segment, and the nearer endpoint where it falls before the start
+    or past the end.
+    
+    Args:
+        lat1_rad, lon1_rad, lat2_rad, lon2_rad: Segment endpoints (radians)
+        lat_rad, lon_rad: Point coordinate arrays (radians)
+        from_start_nm, from_end_nm: Haversine distances from the points to
+            each endpoint, in nm
+    
+    Returns:
+        Distance from each point to the segment, in nm
+    """
+    earth_radius_nm = 3440.065
+    endpoint_nm = np.minimum(from_start_nm, from_end_nm)
+    
+    route_angle = float(_haversine_nm(lat1_rad, lon1_rad, lat2_rad, lon2_rad)) / earth_radius_nm
+    if route_angle < 1e-9:
+        return endpoint_nm
+    
+    # Angle from the start to each point, and its bearing relative to the route
+    start_angle = from_start_nm / earth_radius_nm
+    relative_bearing = (_initial_bearing(lat1_rad, lon1_rad, lat_rad, lon_rad)
+                        - _initial_bearing(lat1_rad, lon1_rad, lat2_rad, lon2_rad))
+    
+    cross_track = np.arcsin(np.clip(np.sin(start_angle) * np.sin(relative_bearing), -1.0, 1.0))
+    along_track = np.arccos(np.clip(np.cos(start_angle) / np.cos(cross_track), -1.0, 1.0))
+    # arccos loses the sign: points behind the start project before it
+    along_track = np.where(np.cos(relative_bearing) < 0, -along_track, along_track)
+    
+    on_segment = (along_track >= 0) & (along_track <= route_angle)
+    return np.where(on_segment, np.abs(cross_track) * earth_radius_nm, endpoint_nm)
+
+
+@njit(parallel=True, cache=True)
+def _nearest_airports(wp_lat, wp_lon, ap_lat, ap_lon):
+    """
+    Nearest airport for each waypoint (Numba kernel, radian arrays).
+    
+    Does the same haversine and first-minimum argmin as the NumPy distance
+    matrix in check_etops_compliance, one waypoint at a time, without the
+    waypoints x airports intermediate.
+    
+    Returns:
+        (airport indices, distances in nm), one entry per waypoint
+    """
+    n = wp_lat.shape[0]
+    nearest = np.zeros(n, dtype=np.int64)
+    nearest_d = np.empty(n)
+    for i in prange(n):
+        cos_lat = math.cos(wp_lat[i])
+        best = np.inf
+        for j in range(ap_lat.shape[0]):
+            dlat = ap_lat[j] - wp_lat[i]
+            dlon = ap_lon[j] - wp_lon[i]
+            a = math.sin(dlat/2)**2 + cos_lat * math.cos(ap_lat[j]) * math.sin(dlon/2)**2
+            d = 3440.065 * (2 * math.asin(math.sqrt(a)))
+            if d < best:
+                best = d
+                nearest[i] = j
+        nearest_d[i] = best
+    return nearest, nearest_d
+
+
+# ── ETOPS AIRPORT TABLE ───────────────────────────────────────────────────────
+# The ETOPS airports present in AIRPORTS as parallel columns, in
+# ETOPS_SUITABLE_AIRPORTS order, built once so queries index them by row
+# instead of walking both dicts; coordinates also as radian arrays, so one
+# vectorized haversine covers them all
+
+_ETOPS_ICAO: List[str] = []
+_ETOPS_NAME: List[str] = []
+_ETOPS_COUNTRY: List[str] = []
+_ETOPS_LAT_DEG: List[float] = []
+_ETOPS_LON_DEG: List[float] = []
+
+for _icao, _info in ETOPS_SUITABLE_AIRPORTS.items():
+    _airport = AIRPORTS.get(_icao)
+    if _airport is None:
+        continue
+    _ETOPS_ICAO.append(_icao)
+    _ETOPS_NAME.append(_info['name'])
+    _ETOPS_COUNTRY.append(_info['country'])
+    _ETOPS_LAT_DEG.append(_airport['lat'])
+    _ETOPS_LON_DEG.append(_airport['lon'])
+
+_ETOPS_LAT = np.radians(np.array(_ETOPS_LAT_DEG, dtype=np.float64))
+_ETOPS_LON = np.radians(np.array(_ETOPS_LON_DEG, dtype=np.float64))
+
+
+def _unit_vectors(lat_rad, lon_rad) -> np.ndarray:
+    """(x, y, z) points on the unit sphere for latitudes/longitudes in radians"""
+    cos_lat = np.cos(lat_rad)
+    return np.stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)], axis=-1)
+
+
+# Chord length on the unit sphere grows monotonically with great-circle
+# distance, so the tree's nearest neighbour is the nearest airport
+_ETOPS_TREE = cKDTree(_unit_vectors(_ETOPS_LAT, _ETOPS_LON)) if SCIPY_AVAILABLE and _ETOPS_ICAO else None
+
+
+def _etops_distances_nm(lat: float, lon: float) -> np.ndarray:
+    """Distances in nm from a point to every airport in _ETOPS_ICAO"""
+    return _haversine_nm(math.radians(lat), math.radians(lon), _ETOPS_LAT, _ETOPS_LON)
+
+
+@functools.lru_cache(maxsize=1024)
+def _nearest_diversions(coords: Tuple[Tuple[float, float], ...]) -> Tuple[tuple, tuple]:
+    """
+    Nearest ETOPS-suitable airport for every waypoint at once: a KD-tree
+    query, the fused Numba scan, or a waypoints x airports distance matrix
+    with argmin along each row (both scans keep the first airport on ties).
+    
+    Cached on the exact coordinates, since the answer doesn't depend on the
+    aircraft or cruise speed: re-checking a route, or checking it for
+    another aircraft, skips the search entirely.
+    
+    Args:
+        coords: (lat, lon) of each waypoint, in degrees
+    
+    Returns:
+        (_ETOPS_ICAO row indices, distances in nm), one entry per waypoint;
+        None and inf when no ETOPS airport is known
+    """
+    count = len(coords)
+    if not _ETOPS_ICAO or not count:
+        return (None,) * count, (float('inf'),) * count
+    
+    wp = np.radians(np.array(coords, dtype=np.float64))
+    wp_lat = wp[:, 0]
+    wp_lon = wp[:, 1]
+    
+    if _ETOPS_TREE is not None:
+        # Tree descent picks the airport; the distance is still haversine
+        _, nearest = _ETOPS_TREE.query(_unit_vectors(wp_lat, wp_lon), k=1)
+        nearest_d = _haversine_nm(wp_lat, wp_lon, _ETOPS_LAT[nearest], _ETOPS_LON[nearest])
+    elif NUMBA_AVAILABLE:
+        nearest, nearest_d = _nearest_airports(wp_lat, wp_lon, _ETOPS_LAT, _ETOPS_LON)
+    else:
+        distances = _haversine_nm(wp_lat[:, None], wp_lon[:, None],
+                                  _ETOPS_LAT[None, :], _ETOPS_LON[None, :])
+        nearest = distances.argmin(axis=1)
+        nearest_d = distances[np.arange(count), nearest]
+    
+    return tuple(nearest.tolist()), tuple(nearest_d.tolist())
+
+
 # ── ETOPS COMPLIANCE CHECKING ─────────────────────────────────────────────────
 
+@functools.lru_cache(maxsize=64)
+def _etops_params(aircraft_code: str, cruise_speed_kt: float = None) -> Optional[Tuple]:
+    """
+    Aircraft lookup and ETOPS limits, cached per (aircraft_code, cruise_speed_kt).
+    The cached aircraft dict is shared, so callers must not modify it.
+    
+    Returns:
+        (aircraft, etops_minutes, cruise_speed_kt, max_diversion_distance_nm),
+        with the speed defaulted from the aircraft database; etops_minutes and
+        the distance are None for aircraft without an ETOPS rating. None if the
+        aircraft is not found.
+    """
+    aircraft = lookup_aircraft(aircraft_code)
+    if not aircraft:
+        return None
+    
+    etops_minutes = aircraft.get('etops_minutes')
+    if etops_minutes is None:
+        return aircraft, None, cruise_speed_kt, None
+    
+    # Use aircraft cruise speed if not provided
+    if cruise_speed_kt is None:
+        cruise_speed_kt = aircraft['typical_cruise_ktas']
+    
+    # Maximum diversion distance based on ETOPS rating
+    return aircraft, etops_minutes, cruise_speed_kt, (etops_minutes / 60) * cruise_speed_kt
+
+
 def check_etops_compliance(aircraft_code: str, waypoints: List[Dict], 
                           cruise_speed_kt: float = None) -> Dict:
     """
@@ -98,13 +312,13 @@ def check_etops_compliance(aircraft_code: str, waypoints: List[Dict],
     Returns:
         dict with compliance status and details
     """
-    # Look up aircraft
-    aircraft = lookup_aircraft(aircraft_code)
-    if not aircraft:
+    # Look up aircraft and its ETOPS limits
+    params = _etops_params(aircraft_code, cruise_speed_kt)
+    if params is None:
         return {"error": f"Aircraft '{aircraft_code}' not found"}
+    aircraft, etops_minutes, cruise_speed_kt, max_diversion_distance_nm = params
     
     # Check if aircraft is ETOPS rated
-    etops_minutes = aircraft.get('etops_minutes')
     if etops_minutes is None:
         return {
             "compliant": True,
@@ -113,39 +327,26 @@ def check_etops_compliance(aircraft_code: str, waypoints: List[Dict],
             "aircraft": aircraft['full_name']
         }
     
-    # Use aircraft cruise speed if not provided
-    if cruise_speed_kt is None:
-        cruise_speed_kt = aircraft['typical_cruise_ktas']
-    
-    # Calculate maximum diversion distance based on ETOPS rating
-    max_diversion_distance_nm = (etops_minutes / 60) * cruise_speed_kt
+    # Nearest ETOPS-suitable airport for every waypoint (cached per route)
+    nearest_rows, nearest_distances = _nearest_diversions(
+        tuple((w['lat'], w['lon']) for w in waypoints)
+    )
     
     # Check each waypoint
     violations = []
     compliant_points = []
     
-    for waypoint in waypoints:
-        lat = waypoint['lat']
-        lon = waypoint['lon']
-        
-        # Find nearest ETOPS-suitable airport
+    for waypoint, row, nearest_distance in zip(waypoints, nearest_rows, nearest_distances):
         nearest_airport = None
-        nearest_distance = float('inf')
         
-        for icao, airport_info in ETOPS_SUITABLE_AIRPORTS.items():
-            if icao in AIRPORTS:
-                airport = AIRPORTS[icao]
-                distance = haversine_distance(lat, lon, airport['lat'], airport['lon'])
-                
-                if distance < nearest_distance:
-                    nearest_distance = distance
-                    nearest_airport = {
-                        "icao": icao,
-                        "name": airport_info['name'],
-                        "country": airport_info['country'],
-                        "distance_nm": round(distance, 1),
-                        "time_minutes": round((distance / cruise_speed_kt) * 60, 1)
-                    }
+        if row is not None:
+            nearest_airport = {
+                "icao": _ETOPS_ICAO[row],
+                "name": _ETOPS_NAME[row],
+                "country": _ETOPS_COUNTRY[row],
+                "distance_nm": round(nearest_distance, 1),
+                "time_minutes": round((nearest_distance / cruise_speed_kt) * 60, 1)
+            }
         
         # Check if within ETOPS limit
         if nearest_airport and nearest_distance <= max_diversion_distance_nm:
@@ -211,46 +412,30 @@ def find_etops_diversions_along_route(origin_code: str, dest_code: str,
     if not origin or not dest:
         return []
     
-    # Calculate midpoint
-    mid_lat = (origin['lat'] + dest['lat']) / 2
-    mid_lon = (origin['lon'] + dest['lon']) / 2
-    
-    # Find airports near the route
+    # Distances from the origin and destination to every ETOPS airport at
+    # once, then from each airport to the great-circle route between them
+    from_origin = _etops_distances_nm(origin['lat'], origin['lon'])
+    from_dest = _etops_distances_nm(dest['lat'], dest['lon'])
+    from_route = _distance_from_segment_nm(
+        math.radians(origin['lat']), math.radians(origin['lon']),
+        math.radians(dest['lat']), math.radians(dest['lon']),
+        _ETOPS_LAT, _ETOPS_LON, from_origin, from_dest
+    )
+    
+    # Include if reasonably close to the route
     route_airports = []
     
-    for icao, airport_info in ETOPS_SUITABLE_AIRPORTS.items():
-        if icao in AIRPORTS:
-            airport = AIRPORTS[icao]
-            
-            # Calculate distance from route midpoint
-            distance_from_midpoint = haversine_distance(
-                mid_lat, mid_lon,
-                airport['lat'], airport['lon']
-            )
-            
-            # Calculate distances from origin and destination
-            distance_from_origin = haversine_distance(
-                origin['lat'], origin['lon'],
-                airport['lat'], airport['lon']
-            )
-            
-            distance_from_dest = haversine_distance(
-                dest['lat'], dest['lon'],
-                airport['lat'], airport['lon']
-            )
-            
-            # Include if reasonably close to the route
-            if distance_from_midpoint <= max_distance_nm:
-                route_airports.append({
-                    "icao": icao,
-                    "name": airport_info['name'],
-                    "country": airport_info['country'],
-                    "lat": airport['lat'],
-                    "lon": airport['lon'],
-                    "distance_from_origin_nm": round(distance_from_origin, 1),
-                    "distance_from_dest_nm": round(distance_from_dest, 1),
-                    "distance_from_route_nm": round(distance_from_midpoint, 1)
-                })
+    for idx in np.flatnonzero(from_route <= max_distance_nm).tolist():
+        route_airports.append({
+            "icao": _ETOPS_ICAO[idx],
+            "name": _ETOPS_NAME[idx],
+            "country": _ETOPS_COUNTRY[idx],
+            "lat": _ETOPS_LAT_DEG[idx],
+            "lon": _ETOPS_LON_DEG[idx],
+            "distance_from_origin_nm": round(float(from_origin[idx]), 1),
+            "distance_from_dest_nm": round(float(from_dest[idx]), 1),
+            "distance_from_route_nm": round(float(from_route[idx]), 1)
+        })
     
     # Sort by distance from origin
     route_airports.sort(key=lambda x: x['distance_from_origin_nm'])
@@ -2,6 +2,12 @@
 # Phase 1 - Part B: Fuel Calculation Engine
 # Based on ICAO / airline industry standard fuel planning rules
 
+import functools
+import sys
+from types import MappingProxyType
+
+import numpy as np
+
 from aircraft_database import lookup_aircraft
 
 
@@ -11,6 +17,38 @@ TAXI_FUEL_KG            = 200    # average fuel used during taxi/startup
 RESERVE_FUEL_MINUTES    = 30     # final reserve (30 min holding at destination)
 ALTERNATE_FUEL_MINUTES  = 45     # fuel to fly to alternate airport if needed
 
+# Bits of calculate_fuel_batch's "safety_mask", one per passed check
+SAFETY_FUEL_FITS    = 0b0001
+SAFETY_UNDER_MTOW   = 0b0010
+SAFETY_UNDER_MLW    = 0b0100
+SAFETY_WITHIN_RANGE = 0b1000
+SAFETY_ALL_PASSED   = 0b1111
+
+# Report borders, built once
+_BORDER_THICK = "═" * 58
+_BORDER_THIN  = "─" * 58
+
+
+@functools.lru_cache(maxsize=64)
+def _lookup_aircraft_cached(aircraft_code: str):
+    """
+    lookup_aircraft, memoized per code string, plus the fuel figures that
+    depend only on the aircraft:
+        reserve_fuel_kg  : final reserve (RESERVE_FUEL_MINUTES of burn)
+        alternate_fuel_kg: alternate fuel (ALTERNATE_FUEL_MINUTES of burn)
+        estimated_oew_kg : rough Operating Empty Weight (~50% of MTOW)
+    The record is wrapped in a read-only MappingProxyType, since every
+    caller shares the cached copy.
+    """
+    aircraft = lookup_aircraft(aircraft_code)
+    if not aircraft:
+        return None
+
+    aircraft["reserve_fuel_kg"] = (RESERVE_FUEL_MINUTES / 60) * aircraft["fuel_burn_kgh"]
+    aircraft["alternate_fuel_kg"] = (ALTERNATE_FUEL_MINUTES / 60) * aircraft["fuel_burn_kgh"]
+    aircraft["estimated_oew_kg"] = aircraft["mtow_kg"] * 0.50
+    return MappingProxyType(aircraft)
+
 
 def calculate_flight_time(distance_nm: float, cruise_speed_ktas: float) -> float:
     """
@@ -39,7 +77,7 @@ def calculate_fuel(aircraft_code: str, distance_nm: float,
     """
 
     # ── 1. Look up aircraft ───────────────────────────────────────────────────
-    aircraft = lookup_aircraft(aircraft_code)
+    aircraft = _lookup_aircraft_cached(aircraft_code)
     if not aircraft:
         return {"error": f"Aircraft '{aircraft_code}' not found in database."}
 
@@ -56,13 +94,10 @@ def calculate_fuel(aircraft_code: str, distance_nm: float,
     contingency_kg   = trip_fuel_kg * CONTINGENCY_PERCENT
 
     # ── 5. Alternate fuel (fuel to fly ~200nm to alternate airport) ───────────
-    alternate_fuel_kg = 0.0
-    if include_alternate:
-        alternate_time_hr  = ALTERNATE_FUEL_MINUTES / 60
-        alternate_fuel_kg  = alternate_time_hr * aircraft["fuel_burn_kgh"]
+    alternate_fuel_kg = aircraft["alternate_fuel_kg"] if include_alternate else 0.0
 
     # ── 6. Final reserve fuel (30 min holding) ────────────────────────────────
-    reserve_fuel_kg  = (RESERVE_FUEL_MINUTES / 60) * aircraft["fuel_burn_kgh"]
+    reserve_fuel_kg  = aircraft["reserve_fuel_kg"]
 
     # ── 7. Taxi fuel ──────────────────────────────────────────────────────────
     taxi_kg          = TAXI_FUEL_KG
@@ -78,7 +113,7 @@ def calculate_fuel(aircraft_code: str, distance_nm: float,
 
     # Check: will aircraft be under MTOW at takeoff?
     # (We estimate Operating Empty Weight as ~50% of MTOW for a rough check)
-    estimated_oew_kg   = aircraft["mtow_kg"] * 0.50
+    estimated_oew_kg   = aircraft["estimated_oew_kg"]
     estimated_tow_kg   = estimated_oew_kg + total_fuel_kg  # simplified (no payload)
     under_mtow         = estimated_tow_kg <= aircraft["mtow_kg"]
 
@@ -132,20 +167,118 @@ def calculate_fuel(aircraft_code: str, distance_nm: float,
         "etops_warning":         etops_warning,
 
         # Overall go / no-go
-        "safe_to_fly":           all([fuel_fits_in_tanks, under_mtow,
-                                      under_mlw, within_range]),
+        "safe_to_fly":           (fuel_fits_in_tanks & under_mtow &
+                                  under_mlw & within_range),
     }
 
     return result
 
 
+def calculate_fuel_batch(aircraft_code: str, distances_nm, headwinds_kt=0.0,
+                         include_alternate: bool = True) -> dict:
+    """
+    Vectorized calculate_fuel for many routes flown by one aircraft.
+
+    Parameters:
+        aircraft_code    : e.g. "B777-300ER", "777", "A380"
+        distances_nm     : array of flight distances in nautical miles
+        headwinds_kt     : headwind in knots per route, or one value for all
+                           (negative = tailwind)
+        include_alternate: whether to include alternate airport fuel
+
+    Returns a dict of NumPy arrays, one element per route, with the same
+    fuel breakdown and safety-check keys as calculate_fuel (unrounded), plus
+    "valid", False where the headwind leaves no positive ground speed; those
+    routes get NaN fuel figures and fail every check. "safety_mask" packs
+    the checks into one uint8 per route (bits: SAFETY_FUEL_FITS,
+    SAFETY_UNDER_MTOW, SAFETY_UNDER_MLW, SAFETY_WITHIN_RANGE).
+    """
+    aircraft = _lookup_aircraft_cached(aircraft_code)
+    if not aircraft:
+        return {"error": f"Aircraft '{aircraft_code}' not found in database."}
+
+    distance_nm = np.asarray(distances_nm, dtype=np.float64)
+    headwind_kt = np.asarray(headwinds_kt, dtype=np.float64)
+    distance_nm, headwind_kt = np.broadcast_arrays(distance_nm, headwind_kt)
+
+    # Aircraft constants, read once for the whole batch
+    burn_kgh = aircraft["fuel_burn_kgh"]
+
+    # Same steps as calculate_fuel, one array operation each
+    effective_speed = aircraft["typical_cruise_ktas"] - headwind_kt
+    valid = effective_speed > 0
+    flight_time_hr = np.divide(distance_nm, effective_speed,
+                               out=np.full(distance_nm.shape, np.nan), where=valid)
+    trip_fuel_kg = flight_time_hr * burn_kgh
+    contingency_kg = trip_fuel_kg * CONTINGENCY_PERCENT
+    alternate_fuel_kg = aircraft["alternate_fuel_kg"] if include_alternate else 0.0
+    reserve_fuel_kg = aircraft["reserve_fuel_kg"]
+    total_fuel_kg = (trip_fuel_kg + contingency_kg +
+                     alternate_fuel_kg + reserve_fuel_kg + TAXI_FUEL_KG)
+
+    estimated_oew_kg = aircraft["estimated_oew_kg"]
+    fuel_at_landing_kg = total_fuel_kg - trip_fuel_kg - TAXI_FUEL_KG
+
+    # NaN compares False, so invalid routes fail the fuel and weight checks
+    fuel_fits_in_tanks = total_fuel_kg <= aircraft["max_fuel_kg"]
+    under_mtow = estimated_oew_kg + total_fuel_kg <= aircraft["mtow_kg"]
+    under_mlw = estimated_oew_kg + fuel_at_landing_kg <= aircraft["mlw_kg"]
+    within_range = valid & (distance_nm <= aircraft["range_nm"])
+
+    # One bit per passed check; safe to fly only with all four set
+    safety_mask = (fuel_fits_in_tanks.astype(np.uint8)
+                   | (under_mtow.astype(np.uint8) << 1)
+                   | (under_mlw.astype(np.uint8) << 2)
+                   | (within_range.astype(np.uint8) << 3))
+
+    return {
+        "aircraft":             aircraft["full_name"],
+        "aircraft_code":        aircraft["code"],
+        "distance_nm":          distance_nm,
+        "headwind_kt":          headwind_kt,
+        "effective_speed_ktas": effective_speed,
+        "valid":                valid,
+        "flight_time_hr":       flight_time_hr,
+        "flight_time_formatted": _format_time_array(flight_time_hr),
+        "trip_fuel_kg":         trip_fuel_kg,
+        "contingency_fuel_kg":  contingency_kg,
+        "alternate_fuel_kg":    np.where(valid, alternate_fuel_kg, np.nan),
+        "reserve_fuel_kg":      np.where(valid, reserve_fuel_kg, np.nan),
+        "taxi_fuel_kg":         np.where(valid, TAXI_FUEL_KG, np.nan),
+        "total_fuel_kg":        total_fuel_kg,
+        "fuel_at_landing_kg":   fuel_at_landing_kg,
+        "fuel_fits_in_tanks":   fuel_fits_in_tanks,
+        "under_mtow":           under_mtow,
+        "under_mlw":            under_mlw,
+        "within_range":         within_range,
+        "safety_mask":          safety_mask,
+        "safe_to_fly":          safety_mask == SAFETY_ALL_PASSED,
+    }
+
+
 def _format_time(hours: float) -> str:
-    """Convert decimal hours to HH:MM string."""
-    h = int(hours)
-    m = int((hours - h) * 60)
+    """Convert decimal hours to HH:MM string (nearest minute)."""
+    h, m = divmod(round(hours * 60), 60)
     return f"{h}h {m:02d}m"
 
 
+def _format_time_array(hours) -> np.ndarray:
+    """
+    _format_time over an array of decimal hours, with the minute arithmetic
+    done in NumPy. Returns an object array of the same shape as hours;
+    NaN entries (invalid batch routes) format as None.
+    """
+    hours = np.asarray(hours, dtype=np.float64)
+    flat = hours.ravel()
+    valid = ~np.isnan(flat)
+    total_min = np.rint(np.where(valid, flat, 0.0) * 60).astype(np.int64)
+    h, m = np.divmod(total_min, 60)
+    formatted = np.empty(flat.shape, dtype=object)
+    formatted[:] = [f"{hh}h {mm:02d}m" if ok else None
+                    for hh, mm, ok in zip(h.tolist(), m.tolist(), valid.tolist())]
+    return formatted.reshape(hours.shape)
+
+
 def print_fuel_report(result: dict) -> None:
     """Print a nicely formatted fuel planning report."""
 
@@ -155,36 +288,38 @@ def print_fuel_report(result: dict) -> None:
 
     safe_icon = "✅" if result["safe_to_fly"] else "❌"
 
-    print("\n" + "═" * 58)
-    print(f"  FUEL PLANNING REPORT  {safe_icon}")
-    print("═" * 58)
-    print(f"  Aircraft   : {result['aircraft']}")
-    print(f"  Distance   : {result['distance_nm']:,.0f} nm")
+    # Built up and written once, rather than one print() per line
+    lines = []
+    lines.append("\n" + _BORDER_THICK)
+    lines.append(f"  FUEL PLANNING REPORT  {safe_icon}")
+    lines.append(_BORDER_THICK)
+    lines.append(f"  Aircraft   : {result['aircraft']}")
+    lines.append(f"  Distance   : {result['distance_nm']:,.0f} nm")
     if result["headwind_kt"] != 0:
         wind_label = "headwind" if result["headwind_kt"] > 0 else "tailwind"
-        print(f"  Wind       : {abs(result['headwind_kt'])} kt {wind_label}")
-    print(f"  Est. Speed : {result['effective_speed_ktas']} ktas")
-    print(f"  Flight Time: {result['flight_time_formatted']}")
-    print("─" * 58)
-    print(f"  FUEL BREAKDOWN                              (kg)")
-    print("─" * 58)
-    print(f"  Trip fuel                        {result['trip_fuel_kg']:>10,}")
-    print(f"  Contingency (5%)                 {result['contingency_fuel_kg']:>10,}")
-    print(f"  Alternate fuel                   {result['alternate_fuel_kg']:>10,}")
-    print(f"  Final reserve (30 min)           {result['reserve_fuel_kg']:>10,}")
-    print(f"  Taxi fuel                        {result['taxi_fuel_kg']:>10,}")
-    print("─" * 58)
-    print(f"  TOTAL FUEL REQUIRED              {result['total_fuel_kg']:>10,}")
-    print(f"  Max fuel capacity                {result['max_fuel_capacity_kg']:>10,}")
-    print("─" * 58)
-    print(f"  WEIGHT CHECKS")
-    print("─" * 58)
-    print(f"  MTOW                             {result['mtow_kg']:>10,} kg")
-    print(f"  MLW                              {result['mlw_kg']:>10,} kg")
-    print(f"  Fuel at landing (est.)           {result['fuel_at_landing_kg']:>10,} kg")
-    print("─" * 58)
-    print(f"  SAFETY CHECKS")
-    print("─" * 58)
+        lines.append(f"  Wind       : {abs(result['headwind_kt'])} kt {wind_label}")
+    lines.append(f"  Est. Speed : {result['effective_speed_ktas']} ktas")
+    lines.append(f"  Flight Time: {result['flight_time_formatted']}")
+    lines.append(_BORDER_THIN)
+    lines.append(f"  FUEL BREAKDOWN                              (kg)")
+    lines.append(_BORDER_THIN)
+    lines.append(f"  Trip fuel                        {result['trip_fuel_kg']:>10,}")
+    lines.append(f"  Contingency (5%)                 {result['contingency_fuel_kg']:>10,}")
+    lines.append(f"  Alternate fuel                   {result['alternate_fuel_kg']:>10,}")
+    lines.append(f"  Final reserve (30 min)           {result['reserve_fuel_kg']:>10,}")
+    lines.append(f"  Taxi fuel                        {result['taxi_fuel_kg']:>10,}")
+    lines.append(_BORDER_THIN)
+    lines.append(f"  TOTAL FUEL REQUIRED              {result['total_fuel_kg']:>10,}")
+    lines.append(f"  Max fuel capacity                {result['max_fuel_capacity_kg']:>10,}")
+    lines.append(_BORDER_THIN)
+    lines.append(f"  WEIGHT CHECKS")
+    lines.append(_BORDER_THIN)
+    lines.append(f"  MTOW                             {result['mtow_kg']:>10,} kg")
+    lines.append(f"  MLW                              {result['mlw_kg']:>10,} kg")
+    lines.append(f"  Fuel at landing (est.)           {result['fuel_at_landing_kg']:>10,} kg")
+    lines.append(_BORDER_THIN)
+    lines.append(f"  SAFETY CHECKS")
+    lines.append(_BORDER_THIN)
 
     checks = [
         ("Fuel fits in tanks",     result["fuel_fits_in_tanks"]),
@@ -194,17 +329,19 @@ def print_fuel_report(result: dict) -> None:
     ]
     for label, passed in checks:
         icon = "✅" if passed else "❌"
-        print(f"  {icon}  {label}")
+        lines.append(f"  {icon}  {label}")
 
     if result["etops_warning"]:
-        print(f"\n  {result['etops_warning']}")
+        lines.append(f"\n  {result['etops_warning']}")
 
-    print("═" * 58)
+    lines.append(_BORDER_THICK)
     if result["safe_to_fly"]:
-        print("  ✅  ALL CHECKS PASSED — SAFE TO PLAN THIS FLIGHT")
+        lines.append("  ✅  ALL CHECKS PASSED — SAFE TO PLAN THIS FLIGHT")
     else:
-        print("  ❌  ONE OR MORE CHECKS FAILED — REVIEW BEFORE FLIGHT")
-    print("═" * 58 + "\n")
+        lines.append("  ❌  ONE OR MORE CHECKS FAILED — REVIEW BEFORE FLIGHT")
+    lines.append(_BORDER_THICK + "\n")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 # ── QUICK TEST ────────────────────────────────────────────────────────────────
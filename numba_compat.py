@@ -0,0 +1,17 @@
+# numba_compat.py
+# Optional Numba support shared by the geometry modules
+# When Numba is not installed, njit is a no-op decorator and prange is range,
+# so decorated functions run as plain Python
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
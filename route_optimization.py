@@ -19,9 +19,14 @@ except ImportError:
     COMPREHENSIVE_DB_AVAILABLE = False
     print("⚠️ Comprehensive waypoint database not available")
 
+# Numba is optional: when installed, the scalar great-circle helpers below are
+# compiled to machine code; otherwise they run as plain Python.
+from numba_compat import njit
+
 
 # ── GREAT CIRCLE CALCULATIONS ─────────────────────────────────────────────────
 
+@njit(cache=True, fastmath=True)
 def calculate_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate initial bearing (heading) from point 1 to point 2.
@@ -41,6 +46,7 @@ def calculate_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> flo
     return (bearing + 360) % 360
 
 
+@njit(cache=True, fastmath=True)
 def calculate_intermediate_point(lat1: float, lon1: float, 
                                  lat2: float, lon2: float, 
                                  fraction: float) -> Tuple[float, float]:
@@ -144,10 +150,10 @@ def generate_route_waypoints(origin_code: str, dest_code: str,
             for i, wp in enumerate(comprehensive_wps, 1):
                 real_waypoints.append({
                     "number": i,
-                    "name": wp['ident'],
-                    "lat": wp['lat'],
-                    "lon": wp['lon'],
-                    "region": wp.get('region', 'N/A'),
+                    "name": wp.ident,
+                    "lat": wp.lat,
+                    "lon": wp.lon,
+                    "region": wp.region,
                     "type": "comprehensive_waypoint"
                 })
         except Exception as e:
@@ -232,6 +238,7 @@ def generate_route_waypoints(origin_code: str, dest_code: str,
     )
 
 
+@njit(cache=True, fastmath=True)
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate great circle distance (same as in airport_database but included here for completeness)"""
     lat1_rad = math.radians(lat1)